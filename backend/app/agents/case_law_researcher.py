@@ -1,19 +1,30 @@
 """Case Law Research Agent - Finds and analyzes precedents"""
-from typing import Dict, Any, List
-from app.agents.prompts import CASE_LAW_RESEARCH_PROMPT
+from typing import Dict, Any, List, Optional
+from app.agents.prompts import CASE_LAW_RESEARCH_PROMPT, CASE_LAW_RESEARCH_INSTRUCTIONS
+from app.agents.context import format_chunks
 from app.services.llm_service import llm_service
 
+CONTEXT_TEMPLATE = (
+    "Case: {title}\n"
+    "Court: {court_level}\n"
+    "Jurisdiction: {jurisdiction}\n"
+    "Year: {year}\n"
+    "Excerpt:\n{text}"
+)
+
 
 class CaseLawResearcherAgent:
     """Agent for researching case law and precedents"""
     
     def __init__(self):
         self.system_prompt = CASE_LAW_RESEARCH_PROMPT
+        self.instructions = CASE_LAW_RESEARCH_INSTRUCTIONS
     
     async def research_case_law(
         self,
         query: str,
-        retrieved_chunks: List[Dict[str, Any]]
+        retrieved_chunks: List[Dict[str, Any]],
+        organization_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Research case law and extract precedents
@@ -21,47 +32,31 @@ class CaseLawResearcherAgent:
         Args:
             query: User query about case law
             retrieved_chunks: Retrieved case law chunks
+            organization_id: Organization the query is made for, scoping the response cache
         
         Returns:
             Dict with case analysis, precedents, citations
         """
         # Format case law context
         if retrieved_chunks:
-            context = "\n\n".join([
-                f"Case: {chunk.get('metadata', {}).get('title', 'Unknown')}\n"
-                f"Court: {chunk.get('metadata', {}).get('court_level', 'Unknown')}\n"
-                f"Jurisdiction: {chunk.get('metadata', {}).get('jurisdiction', 'Unknown')}\n"
-                f"Year: {chunk.get('metadata', {}).get('year', 'Unknown')}\n"
-                f"Excerpt:\n{chunk.get('text', '')}"
-                for chunk in retrieved_chunks[:3]
-            ])
+            context = format_chunks(retrieved_chunks, CONTEXT_TEMPLATE)
         else:
             context = "No specific case law documents found. Please use your general legal knowledge about case law principles and precedents to answer."
         
         messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"""
-User Query: {query}
-
-Relevant Case Law:
-{context}
-
-Provide:
-1. Full case citations (if documents provided)
-2. Ratio decidendi (legal reasoning) - from documents or general principles
-3. Binding vs. persuasive authority concepts
-4. Relevant quotes from judgments (if available)
-5. How case law principles apply to the query
-
-Combine document-specific information (if any) with general case law knowledge. Be precise with citations when available.
-"""}
+            {"role": "user", "content": self.instructions},
+            {"role": "user", "content": f"User Query: {query}\n\nRelevant Case Law:\n{context}"}
         ]
         
         try:
             response = await llm_service.chat_completion(
                 messages=messages,
                 temperature=0.1,
-                max_tokens=1500
+                max_tokens=1500,
+                cache_text=query,
+                cache_context=context,
+                organization_id=organization_id
             )
             
             return {
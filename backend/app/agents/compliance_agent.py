@@ -1,19 +1,33 @@
 """Compliance & Regulatory Agent - Checks regulatory compliance"""
-from typing import Dict, Any, List
-from app.agents.prompts import COMPLIANCE_REGULATORY_PROMPT
+import re
+from typing import Dict, Any, List, Optional
+from app.agents.prompts import COMPLIANCE_REGULATORY_PROMPT, COMPLIANCE_REGULATORY_INSTRUCTIONS
+from app.agents.context import format_chunks
 from app.services.llm_service import llm_service
 
+_VERDICT_RE = re.compile(r"\b(NON[- ]?)?COMPLIANT\b", re.IGNORECASE)
+# Explicit "Compliance verdict: X" line the prompt asks the model to lead with
+_STATED_VERDICT_RE = re.compile(r"verdict\W*(NON[- ]?COMPLIANT|COMPLIANT|UNCLEAR)\b", re.IGNORECASE)
+
+CONTEXT_TEMPLATE = (
+    "Regulation: {title}\n"
+    "Jurisdiction: {jurisdiction}\n"
+    "Text:\n{text}"
+)
+
 
 class ComplianceAgent:
     """Agent for regulatory compliance checking"""
     
     def __init__(self):
         self.system_prompt = COMPLIANCE_REGULATORY_PROMPT
+        self.instructions = COMPLIANCE_REGULATORY_INSTRUCTIONS
     
     async def check_compliance(
         self,
         query: str,
-        retrieved_chunks: List[Dict[str, Any]]
+        retrieved_chunks: List[Dict[str, Any]],
+        organization_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Check compliance against regulations
@@ -21,57 +35,37 @@ class ComplianceAgent:
         Args:
             query: User query about compliance
             retrieved_chunks: Retrieved regulatory text chunks
+            organization_id: Organization the query is made for, scoping the response cache
         
         Returns:
             Dict with compliance verdict, rationale, regulations
         """
         # Format regulatory context
         if retrieved_chunks:
-            context = "\n\n".join([
-                f"Regulation: {chunk.get('metadata', {}).get('title', 'Unknown')}\n"
-                f"Jurisdiction: {chunk.get('metadata', {}).get('jurisdiction', 'Unknown')}\n"
-                f"Text:\n{chunk.get('text', '')}"
-                for chunk in retrieved_chunks[:3]
-            ])
+            context = format_chunks(retrieved_chunks, CONTEXT_TEMPLATE)
         else:
             context = "No specific regulatory documents found. Please use your general knowledge of compliance frameworks and regulatory principles to answer."
         
         messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"""
-User Query: {query}
-
-Applicable Regulations:
-{context}
-
-Provide:
-1. Compliance verdict: COMPLIANT / NON-COMPLIANT / UNCLEAR
-2. Detailed rationale with specific rule citations (if documents provided) or general regulatory principles
-3. Jurisdiction (if applicable)
-4. Areas requiring expert review
-
-Combine document-specific regulations (if any) with general compliance knowledge. Be conservative - if unclear, mark as UNCLEAR.
-"""}
+            {"role": "user", "content": self.instructions},
+            {"role": "user", "content": f"User Query: {query}\n\nApplicable Regulations:\n{context}"}
         ]
         
         try:
             response = await llm_service.chat_completion(
                 messages=messages,
                 temperature=0.1,
-                max_tokens=1500
+                max_tokens=1500,
+                cache_text=query,
+                cache_context=context,
+                organization_id=organization_id
             )
-            
-            # Extract verdict from response
             content = response["content"]
-            verdict = "UNCLEAR"
-            if "COMPLIANT" in content.upper() and "NON-COMPLIANT" not in content.upper():
-                verdict = "COMPLIANT"
-            elif "NON-COMPLIANT" in content.upper():
-                verdict = "NON-COMPLIANT"
             
             return {
                 "compliance_analysis": content,
-                "verdict": verdict,
+                "verdict": self._extract_verdict(content),
                 "agent": "compliance_agent",
                 "tokens_used": response["total_tokens"],
                 "cost": response["cost"]
@@ -84,6 +78,25 @@ Combine document-specific regulations (if any) with general compliance knowledge
                 "agent": "compliance_agent",
                 "error": str(e)
             }
+    
+    @staticmethod
+    def _normalize_verdict(verdict: str) -> str:
+        verdict = verdict.upper()
+        return verdict if verdict in ("COMPLIANT", "UNCLEAR") else "NON-COMPLIANT"
+    
+    def _extract_verdict(self, content: str) -> str:
+        """Use the stated verdict, else scan for any (non-)compliance mention"""
+        match = _STATED_VERDICT_RE.search(content)
+        if match:
+            return self._normalize_verdict(match.group(1))
+        
+        verdict = "UNCLEAR"
+        for match in _VERDICT_RE.finditer(content):
+            # Any non-compliance mention takes precedence
+            if match.group(1):
+                return "NON-COMPLIANT"
+            verdict = "COMPLIANT"
+        return verdict
 
 
 # Global compliance agent instance
@@ -0,0 +1,40 @@
+"""Helpers for formatting retrieved chunks into agent prompts"""
+from typing import Any, Dict, List
+from app.core.config import settings
+
+
+EMPTY_METADATA: Dict[str, Any] = {}
+
+
+class _ChunkFields(dict):
+    """Format mapping that falls back to 'Unknown' for missing metadata"""
+    
+    def __missing__(self, key: str) -> str:
+        return "Unknown"
+
+
+def format_chunks(
+    chunks: List[Dict[str, Any]],
+    template: str,
+    limit: int = 3
+) -> str:
+    """
+    Render retrieved chunks with a str.format template
+    
+    Args:
+        chunks: Retrieved chunks with 'text' and 'metadata'
+        template: Format string using metadata keys and {text}
+        limit: Maximum number of chunks to include
+    
+    Returns:
+        Chunks joined by blank lines; chunk text is truncated to
+        CONTEXT_CHUNK_MAX_CHARS so one oversized chunk can't inflate the prompt
+    """
+    max_chars = settings.CONTEXT_CHUNK_MAX_CHARS
+    return "\n\n".join(
+        template.format_map(_ChunkFields(
+            chunk.get("metadata") or EMPTY_METADATA,
+            text=chunk.get("text", "")[:max_chars]
+        ))
+        for chunk in chunks[:limit]
+    )
@@ -1,6 +1,6 @@
 """Contract Analysis Agent - Analyzes contracts and identifies risks"""
-from typing import Dict, Any
-from app.agents.prompts import CONTRACT_ANALYSIS_PROMPT
+from typing import Dict, Any, Optional
+from app.agents.prompts import CONTRACT_ANALYSIS_PROMPT, CONTRACT_ANALYSIS_INSTRUCTIONS
 from app.services.llm_service import llm_service
 
 
@@ -9,11 +9,13 @@ class ContractAnalyzerAgent:
     
     def __init__(self):
         self.system_prompt = CONTRACT_ANALYSIS_PROMPT
+        self.instructions = CONTRACT_ANALYSIS_INSTRUCTIONS
     
     async def analyze_contract(
         self,
         query: str,
-        contract_text: str = None
+        contract_text: str = None,
+        organization_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Analyze contract for clauses, risks, and obligations
@@ -21,6 +23,7 @@ class ContractAnalyzerAgent:
         Args:
             query: User query about contract
             contract_text: Contract text to analyze (if provided)
+            organization_id: Organization the query is made for, scoping the response cache
         
         Returns:
             Dict with clause analysis, risks, obligations
@@ -30,28 +33,18 @@ class ContractAnalyzerAgent:
         
         messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"""
-User Query: {query}
-
-Contract Text:
-{contract_text[:5000]}  # Limit to first 5000 chars
-
-Provide:
-1. Key clauses identified (payment, termination, liability, IP, etc.)
-2. Potential risks and unusual terms
-3. Obligations for each party
-4. Missing standard clauses
-5. Areas requiring legal review
-
-Quote exact clause text when referencing.
-"""}
+            {"role": "user", "content": self.instructions},
+            {"role": "user", "content": f"User Query: {query}\n\nContract Text:\n{contract_text[:5000]}"}
         ]
         
         try:
             response = await llm_service.chat_completion(
                 messages=messages,
                 temperature=0.1,
-                max_tokens=2000
+                max_tokens=2000,
+                cache_text=query,
+                cache_context=contract_text,
+                organization_id=organization_id
             )
             
             return {
@@ -1,8 +1,90 @@
 """Orchestrator Agent - Routes queries to appropriate specialist agents"""
-import json
-from typing import Dict, Any, List
-from app.agents.prompts import ORCHESTRATOR_PROMPT
-from app.services.llm_service import llm_service
+import asyncio
+import logging
+import re
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from app.agents.prompts import ORCHESTRATOR_PROMPT, ORCHESTRATOR_INSTRUCTIONS
+from app.agents.statutory_interpreter import statutory_interpreter_agent
+from app.agents.case_law_researcher import case_law_researcher_agent
+from app.agents.contract_analyzer import contract_analyzer_agent
+from app.agents.compliance_agent import compliance_agent
+from app.core.config import settings
+from app.services.llm_service import llm_service, extract_json
+from app.services.embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+# Specialist agents per intent: (agent name, key holding the agent's answer)
+SPECIALIST_AGENTS = {
+    "statutory_interpretation": ("statutory_interpreter", "interpretation"),
+    "case_law_research": ("case_law_researcher", "case_analysis"),
+    "contract_analysis": ("contract_analyzer", "contract_analysis"),
+    "compliance_check": ("compliance_agent", "compliance_analysis"),
+}
+
+# Ordered agents per intent; tuples so callers can't mutate the shared value
+_PRIORITY: Dict[str, Tuple[str, ...]] = {
+    "statutory_interpretation": ("retriever", "statutory_interpreter", "verification", "safety"),
+    "case_law_research": ("retriever", "case_law_researcher", "verification", "safety"),
+    "contract_analysis": ("contract_analyzer", "verification", "safety"),
+    "compliance_check": ("retriever", "compliance_agent", "verification", "safety"),
+    "general_legal": ("retriever", "verification", "safety")
+}
+_DEFAULT_PRIORITY: Tuple[str, ...] = ("retriever", "verification", "safety")
+
+# Example queries per intent used as nearest-prototype classifier anchors
+INTENT_PROTOTYPES = {
+    "statutory_interpretation": [
+        "Interpret this statute and explain what the section means",
+        "What does this article of the act say?",
+        "Explain the provisions of this law in plain language",
+        "What are the requirements under section 10 of the act?",
+        "How should this clause of the legislation be read?",
+    ],
+    "case_law_research": [
+        "Find case precedents on this legal issue",
+        "What did the court decide in this judgment?",
+        "Which court decisions are binding on this question?",
+        "Summarize the ratio decidendi of this case",
+        "Are there precedents where the petitioner won against the respondent?",
+    ],
+    "contract_analysis": [
+        "Review this contract and identify risky clauses",
+        "What are the termination terms in this agreement?",
+        "Which party bears liability under this contract?",
+        "Extract the payment obligations from this agreement",
+        "Are there missing standard clauses in this contract?",
+    ],
+    "compliance_check": [
+        "Is our data processing compliant with GDPR?",
+        "Check whether this practice complies with the regulation",
+        "What regulatory requirements apply to our business?",
+        "Are we compliant with HIPAA rules for patient data?",
+        "Does this policy violate any compliance obligations?",
+    ],
+    "general_legal": [
+        "What is the difference between civil and criminal law?",
+        "Explain the basics of how the legal system works",
+        "What does this legal term mean?",
+        "How do I find a lawyer for my situation?",
+        "What are my general rights as a tenant?",
+    ],
+}
+
+# Unambiguous keywords per intent, compiled into one alternation so a query
+# is scanned once; m.lastgroup names the intent of each match
+_INTENT_KEYWORDS_RE = re.compile(
+    r"(?P<statutory_interpretation>\b(?:sections?|articles?|statutes?|statutory|acts?|legislation)\b)"
+    r"|(?P<case_law_research>\b(?:vs?\.|vs\b|versus\b|precedents?\b|case law\b|judgments?\b|rulings?\b))"
+    r"|(?P<contract_analysis>\b(?:contracts?|clauses?|agreements?|indemnit(?:y|ies))\b)"
+    r"|(?P<compliance_check>\b(?:GDPR|HIPAA|SOX|CCPA|complian(?:t|ce)|regulatory)\b)",
+    re.IGNORECASE
+)
+
+# Softmax temperature applied to prototype cosine similarities
+_INTENT_SOFTMAX_TEMPERATURE = 0.05
 
 
 class OrchestratorAgent:
@@ -10,58 +92,130 @@ class OrchestratorAgent:
     
     def __init__(self):
         self.system_prompt = ORCHESTRATOR_PROMPT
+        self.instructions = ORCHESTRATOR_INSTRUCTIONS
+        self._intent_labels = list(INTENT_PROTOTYPES)
+        self._prototype_matrix: Optional[np.ndarray] = None
+        self._prototype_lock = asyncio.Lock()
+    
+    async def _get_prototypes(self) -> np.ndarray:
+        """Embed the intent prototypes once, as a normalized (intents, N, dim) array"""
+        if self._prototype_matrix is None:
+            async with self._prototype_lock:
+                if self._prototype_matrix is None:
+                    sentences = [s for label in self._intent_labels for s in INTENT_PROTOTYPES[label]]
+                    embeddings = np.asarray(await embedding_service.embed_texts(sentences), dtype=np.float32)
+                    embeddings = embeddings[:, :settings.SIMILARITY_EMBEDDING_DIMENSIONS]
+                    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+                    self._prototype_matrix = embeddings.reshape(len(self._intent_labels), -1, embeddings.shape[1])
+        return self._prototype_matrix
+    
+    def _classify_by_keywords(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify by keyword rules when they point to exactly one intent
+        
+        Returns None when no rule matches or rules for several intents do.
+        """
+        intents = {match.lastgroup for match in _INTENT_KEYWORDS_RE.finditer(query)}
+        if len(intents) != 1:
+            return None
+        
+        intent = intents.pop()
+        return {
+            "intent": intent,
+            "agents_to_call": list(self.get_agent_priority(intent)),
+            "confidence": 0.9,
+            "reasoning": f"Matched {intent} keywords.",
+            "_source": "rule"
+        }
+    
+    async def _classify_locally(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify by cosine similarity to the intent prototypes
+        
+        Returns None when the top two intents are too close to call, so the
+        caller can fall back to the LLM.
+        """
+        prototypes = await self._get_prototypes()
+        query_vector = np.asarray(await embedding_service.embed_query(query), dtype=np.float32)
+        query_vector = query_vector[:settings.SIMILARITY_EMBEDDING_DIMENSIONS]
+        norm = np.linalg.norm(query_vector)
+        if norm == 0:
+            return None
+        query_vector /= norm
+        
+        # Best prototype per intent, then softmax across intents
+        scores = np.dot(prototypes, query_vector).max(axis=1)
+        logits = (scores - scores.max()) / _INTENT_SOFTMAX_TEMPERATURE
+        probs = np.exp(logits) / np.exp(logits).sum()
+        
+        top_two = np.argsort(probs)[-2:]
+        best, runner_up = int(top_two[1]), int(top_two[0])
+        margin = float(probs[best] - probs[runner_up])
+        if margin < settings.INTENT_MIN_MARGIN:
+            return None
+        
+        intent = self._intent_labels[best]
+        return {
+            "intent": intent,
+            "agents_to_call": list(self.get_agent_priority(intent)),
+            "confidence": float(probs[best]),
+            "reasoning": f"Matched {intent} prototypes locally (margin {margin:.2f}).",
+            "_source": "embedding"
+        }
     
     async def classify_intent(self, query: str) -> Dict[str, Any]:
         """
         Classify user intent and determine which agents to call
         
+        Tries keyword rules, then the local prototype classifier, and only
+        spends an LLM call when both are unavailable or ambiguous.
+        
         Args:
             query: User query
         
         Returns:
             Dict with intent, agents_to_call, confidence, reasoning
         """
+        if settings.INTENT_CLASSIFIER_ENABLED:
+            classification = self._classify_by_keywords(query)
+            if classification is not None:
+                return classification
+            try:
+                classification = await self._classify_locally(query)
+                if classification is not None:
+                    return classification
+            except Exception as e:
+                logger.warning(f"Local intent classification failed, using LLM: {e}")
+        
+        return await self._classify_with_llm(query)
+    
+    async def _classify_with_llm(self, query: str) -> Dict[str, Any]:
+        """Classify intent with an LLM call"""
         messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"""
-Classify this legal query:
-
-Query: {query}
-
-Determine:
-1. Primary intent category
-2. Which specialist agents should handle this
-3. Your confidence in the classification
-4. Brief reasoning
-
-Respond with JSON only.
-"""}
+            {"role": "user", "content": self.instructions},
+            {"role": "user", "content": f"Query: {query}"}
         ]
         
         try:
             response = await llm_service.chat_completion(
                 messages=messages,
                 temperature=0.0,
-                max_tokens=300
+                max_tokens=300,
+                cache_text=query,
+                response_mime_type="application/json"
             )
             
             content = response["content"]
             
-            # Extract JSON
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = content.strip()
-            
-            classification = json.loads(json_str)
+            classification = extract_json(content)
             
             # Always include verification and safety agents
             agents = classification.get("agents_to_call", [])
-            if "verification" not in [a.lower() for a in agents]:
+            lowered = {a.lower() for a in agents}
+            if "verification" not in lowered:
                 agents.append("verification")
-            if "safety" not in [a.lower() for a in agents]:
+            if "safety" not in lowered:
                 agents.append("safety")
             
             classification["agents_to_call"] = agents
@@ -77,17 +231,81 @@ Respond with JSON only.
                 "reasoning": f"Classification failed: {str(e)}. Using default routing."
             }
     
-    def get_agent_priority(self, intent: str) -> List[str]:
-        """Get ordered list of agents based on intent"""
-        priority_map = {
-            "statutory_interpretation": ["retriever", "statutory_interpreter", "verification", "safety"],
-            "case_law_research": ["retriever", "case_law_researcher", "verification", "safety"],
-            "contract_analysis": ["contract_analyzer", "verification", "safety"],
-            "compliance_check": ["retriever", "compliance_agent", "verification", "safety"],
-            "general_legal": ["retriever", "verification", "safety"]
-        }
+    @staticmethod
+    def get_agent_priority(intent: str) -> Tuple[str, ...]:
+        """Get ordered agents based on intent"""
+        return _PRIORITY.get(intent, _DEFAULT_PRIORITY)
+    
+    async def run_agents(
+        self,
+        query: str,
+        intents: List[str],
+        chunks: List[Dict[str, Any]],
+        contract_text: Optional[str] = None,
+        organization_id: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the specialist agents for the given intents concurrently
+        
+        Specialists are independent LLM calls, so they are awaited together and
+        the wall time is the slowest agent rather than the sum. Verification
+        consumes their output and must be run by the caller afterwards.
+        
+        Args:
+            query: User query
+            intents: Intents whose specialist agents should run
+            chunks: Retrieved chunks shared by all specialists
+            contract_text: Contract text for the contract analyzer
+            organization_id: Organization the query is made for, scoping
+                cached agent responses
+        
+        Returns:
+            Dict mapping agent name to that agent's result dict
+        """
+        selected = []
+        coros = []
+        for intent in intents:
+            if intent not in SPECIALIST_AGENTS or SPECIALIST_AGENTS[intent] in selected:
+                continue
+            
+            if intent == "statutory_interpretation":
+                coro = statutory_interpreter_agent.interpret_statute(query=query, retrieved_chunks=chunks)
+            elif intent == "case_law_research":
+                coro = case_law_researcher_agent.research_case_law(
+                    query=query,
+                    retrieved_chunks=chunks,
+                    organization_id=organization_id
+                )
+            elif intent == "contract_analysis":
+                coro = contract_analyzer_agent.analyze_contract(
+                    query=query,
+                    contract_text=contract_text,
+                    organization_id=organization_id
+                )
+            else:
+                coro = compliance_agent.check_compliance(
+                    query=query,
+                    retrieved_chunks=chunks,
+                    organization_id=organization_id
+                )
+            
+            selected.append(SPECIALIST_AGENTS[intent])
+            coros.append(coro)
+        
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        
+        agent_results = {}
+        for (name, response_key), result in zip(selected, results):
+            if isinstance(result, Exception):
+                # Same shape the agents return from their own error handlers
+                result = {
+                    response_key: f"Error in {name}: {str(result)}",
+                    "agent": name,
+                    "error": str(result)
+                }
+            agent_results[name] = result
         
-        return priority_map.get(intent, ["retriever", "verification", "safety"])
+        return agent_results
 
 
 # Global orchestrator instance
@@ -1,8 +1,17 @@
 """Retriever Agent - Performs vector search with metadata filtering"""
 from typing import List, Dict, Any, Optional
+import numpy as np
 from app.rag.vector_store import vector_store
 from app.core.config import settings
 
+# MinHash parameters for estimating text Jaccard similarity when chunk
+# embeddings are unavailable: h(x) = (a * x + b) mod p per permutation
+_MINHASH_PERMUTATIONS = 64
+_MINHASH_PRIME = (1 << 31) - 1
+_minhash_rng = np.random.default_rng(42)
+_MINHASH_A = _minhash_rng.integers(1, _MINHASH_PRIME, _MINHASH_PERMUTATIONS, dtype=np.int64)
+_MINHASH_B = _minhash_rng.integers(0, _MINHASH_PRIME, _MINHASH_PERMUTATIONS, dtype=np.int64)
+
 
 class RetrieverAgent:
     """Agent for retrieving relevant document chunks"""
@@ -18,7 +27,9 @@ class RetrieverAgent:
         document_type: Optional[str] = None,
         court_level: Optional[str] = None,
         year: Optional[int] = None,
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        include_embeddings: bool = False,
+        text_max_chars: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant chunks with metadata filtering
@@ -31,6 +42,8 @@ class RetrieverAgent:
             court_level: Filter by court level
             year: Filter by year
             top_k: Number of results
+            include_embeddings: Attach each chunk's embedding vector
+            text_max_chars: Truncate chunk text to this many characters
         
         Returns:
             List of retrieved chunks with metadata and scores
@@ -51,7 +64,9 @@ class RetrieverAgent:
             organization_id=organization_id,
             query=query,
             top_k=top_k or self.top_k,
-            filters=filters if filters else None
+            filters=filters if filters else None,
+            include_embeddings=include_embeddings,
+            text_max_chars=text_max_chars
         )
         
         # Enrich results with actual text
@@ -61,11 +76,14 @@ class RetrieverAgent:
         for result in results:
             # Get document text from metadata
             # In a real system, you'd fetch from document storage
-            enriched_results.append({
+            enriched = {
                 "text": result["metadata"].get("text", ""),
                 "metadata": result["metadata"],
                 "relevance_score": 1.0 / (1.0 + result["score"])  # Convert distance to similarity
-            })
+            }
+            if include_embeddings:
+                enriched["embedding"] = result.get("embedding")
+            enriched_results.append(enriched)
         
         return enriched_results
     
@@ -88,7 +106,8 @@ class RetrieverAgent:
             **kwargs: Additional filters
         
         Returns:
-            Diverse set of retrieved chunks
+            Diverse set of retrieved chunks, each with its stored 'embedding'
+            (None if unavailable) for reuse downstream
         """
         # For simplicity, retrieve more results and apply MMR
         initial_k = (kwargs.get("top_k") or self.top_k) * 2
@@ -97,55 +116,73 @@ class RetrieverAgent:
             organization_id=organization_id,
             query=query,
             top_k=initial_k,
+            include_embeddings=True,
             **{k: v for k, v in kwargs.items() if k != "top_k"}
         )
         
         if not results:
             return []
         
-        # Simple MMR implementation
-        # In production, use proper vector-based MMR
-        selected = [results[0]]  # Start with most relevant
-        remaining = results[1:]
-        
         target_k = kwargs.get("top_k") or self.top_k
-        
-        while len(selected) < target_k and remaining:
-            # Find result that maximizes: relevance - diversity_score * max_similarity_to_selected
-            best_idx = 0
-            best_score = -float('inf')
-            
-            for i, candidate in enumerate(remaining):
-                relevance = candidate["relevance_score"]
-                
-                # Simple text-based diversity (in production, use embeddings)
-                max_similarity = max([
-                    self._text_similarity(candidate["text"], sel["text"])
-                    for sel in selected
-                ])
-                
-                mmr_score = relevance - diversity_score * max_similarity
-                
-                if mmr_score > best_score:
-                    best_score = mmr_score
-                    best_idx = i
-            
-            selected.append(remaining.pop(best_idx))
-        
-        return selected[:target_k]
+        embeddings = [result.get("embedding") for result in results]
+        
+        if any(e is None for e in embeddings):
+            similarities = self._minhash_similarities([r["text"] for r in results])
+        else:
+            # Cosine similarity between all candidate chunks
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms > 0, norms, 1.0)
+            similarities = matrix @ matrix.T
+        relevance = np.array([r["relevance_score"] for r in results], dtype=np.float32)
+        
+        # Start with most relevant, then maximize:
+        # relevance - diversity_score * max_similarity_to_selected
+        selected = [int(relevance.argmax())]
+        remaining = np.ones(len(results), dtype=bool)
+        remaining[selected[0]] = False
+        max_similarity = similarities[selected[0]].copy()
+        
+        while len(selected) < target_k and remaining.any():
+            mmr_scores = np.where(remaining, relevance - diversity_score * max_similarity, -np.inf)
+            best = int(mmr_scores.argmax())
+            selected.append(best)
+            remaining[best] = False
+            np.maximum(max_similarity, similarities[best], out=max_similarity)
+        
+        return [results[i] for i in selected]
     
-    def _text_similarity(self, text1: str, text2: str) -> float:
-        """Simple text similarity (Jaccard)"""
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
-        if not words1 or not words2:
-            return 0.0
+    def _minhash_similarities(self, texts: List[str]) -> np.ndarray:
+        """
+        Estimate pairwise Jaccard similarity of texts with MinHash
         
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
+        Args:
+            texts: Chunk texts
         
-        return len(intersection) / len(union)
+        Returns:
+            n x n matrix of estimated word-set Jaccard similarities
+        """
+        # Map every token to an integer id in one vectorized pass
+        tokenized = [text.lower().split() for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in tokenized), dtype=np.int64, count=len(texts))
+        all_tokens = np.array([token for tokens in tokenized for token in tokens], dtype=str)
+        _, token_ids = np.unique(all_tokens, return_inverse=True)
+        
+        signatures = np.empty((len(texts), _MINHASH_PERMUTATIONS), dtype=np.int64)
+        empty = lengths == 0
+        
+        for i, ids in enumerate(np.split(token_ids.astype(np.int64), np.cumsum(lengths)[:-1])):
+            if empty[i]:
+                signatures[i] = -np.arange(1, _MINHASH_PERMUTATIONS + 1)
+                continue
+            ids = np.unique(ids)
+            signatures[i] = ((np.outer(ids, _MINHASH_A) + _MINHASH_B) % _MINHASH_PRIME).min(axis=0)
+        
+        similarities = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=-1)
+        # Empty texts are dissimilar to everything, matching exact Jaccard
+        similarities[empty, :] = 0.0
+        similarities[:, empty] = 0.0
+        return similarities
 
 
 # Global retriever agent instance
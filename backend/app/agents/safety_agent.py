@@ -1,8 +1,18 @@
 """Safety & Policy Agent - Enforces legal and ethical guardrails"""
-import json
-from typing import Dict, Any
-from app.agents.prompts import SAFETY_POLICY_PROMPT, LEGAL_DISCLAIMER
-from app.services.llm_service import llm_service
+import hashlib
+from typing import Dict, Any, Literal, Optional
+from pydantic import BaseModel
+from app.agents.prompts import SAFETY_POLICY_PROMPT, SAFETY_POLICY_INSTRUCTIONS, LEGAL_DISCLAIMER
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.services.llm_service import llm_service, parse_json_model
+
+
+class SafetyResult(BaseModel):
+    """Expected shape of the safety model's JSON verdict"""
+    safety_check: Literal["PASS", "WARN", "REFUSE"]
+    reason: str = ""
+    suggested_action: str = ""
 
 
 class SafetyAgent:
@@ -10,6 +20,33 @@ class SafetyAgent:
     
     def __init__(self):
         self.system_prompt = SAFETY_POLICY_PROMPT
+        self.instructions = SAFETY_POLICY_INSTRUCTIONS
+    
+    @staticmethod
+    def _cache_key(query: str, jurisdiction: Optional[str]) -> str:
+        digest = hashlib.blake2b(
+            f"{query}|{jurisdiction or ''}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return f"safety:{digest}"
+    
+    async def _get_cached(self, key: str) -> Optional[SafetyResult]:
+        """Return a cached verdict shared across workers, if any"""
+        if not redis_client.redis:
+            return None
+        try:
+            raw = await redis_client.redis.get(key)
+            return SafetyResult.model_validate_json(raw) if raw else None
+        except Exception:
+            return None
+    
+    async def _cache(self, key: str, result: SafetyResult) -> None:
+        """Store a verdict for SAFETY_CACHE_TTL_SECONDS"""
+        if not redis_client.redis:
+            return
+        try:
+            await redis_client.redis.setex(key, settings.SAFETY_CACHE_TTL_SECONDS, result.model_dump_json())
+        except Exception:
+            pass
     
     async def check_safety(
         self,
@@ -26,49 +63,31 @@ class SafetyAgent:
         Returns:
             Dict with safety_check, reason, suggested_action, disclaimer_added
         """
+        # Deterministic at temperature 0, so repeats reuse the verdict
+        cache_key = self._cache_key(query, jurisdiction)
+        result = await self._get_cached(cache_key)
+        if result is not None:
+            return self._with_disclaimer(result)
+        
         messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"""
-Analyze this query for safety concerns:
-
-Query: {query}
-Expected Jurisdiction: {jurisdiction or "Not specified"}
-
-Check for:
-1. Requests for personalized legal advice
-2. Jurisdiction mismatches
-3. Illegal activity requests
-4. Confidential data generation requests
-
-Provide your safety assessment as JSON.
-"""}
+            {"role": "user", "content": self.instructions},
+            {"role": "user", "content": f"Query: {query}\nExpected Jurisdiction: {jurisdiction or 'Not specified'}"}
         ]
         
         try:
             response = await llm_service.chat_completion(
                 messages=messages,
                 temperature=0.0,
-                max_tokens=500
+                max_tokens=500,
+                response_mime_type="application/json"
             )
             
-            # Parse JSON response
-            content = response["content"]
-            
-            # Try to extract JSON from response
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = content.strip()
+            # Parse and validate JSON response
+            result = parse_json_model(response["content"], SafetyResult)
+            await self._cache(cache_key, result)
             
-            safety_result = json.loads(json_str)
-            
-            # Ensure disclaimer is added
-            safety_result["disclaimer_added"] = True
-            safety_result["disclaimer_text"] = LEGAL_DISCLAIMER
-            
-            return safety_result
+            return self._with_disclaimer(result)
             
         except Exception as e:
             # Default to safe behavior on error
@@ -80,6 +99,15 @@ Provide your safety assessment as JSON.
                 "disclaimer_text": LEGAL_DISCLAIMER
             }
     
+    @staticmethod
+    def _with_disclaimer(result: SafetyResult) -> Dict[str, Any]:
+        """Ensure disclaimer is added"""
+        return {
+            **result.model_dump(),
+            "disclaimer_added": True,
+            "disclaimer_text": LEGAL_DISCLAIMER
+        }
+    
     def should_refuse(self, safety_result: Dict[str, Any]) -> bool:
         """Check if request should be refused"""
         return safety_result.get("safety_check") == "REFUSE"
@@ -1,14 +1,22 @@
 """Statutory Interpretation Agent - Interprets laws and statutes"""
 from typing import Dict, Any, List
-from app.agents.prompts import STATUTORY_INTERPRETATION_PROMPT
+from app.agents.prompts import STATUTORY_INTERPRETATION_PROMPT, STATUTORY_INTERPRETATION_INSTRUCTIONS
+from app.agents.context import format_chunks
 from app.services.llm_service import llm_service
 
+CONTEXT_TEMPLATE = (
+    "Legal Text:\n{text}\n"
+    "Source: {title}\n"
+    "Jurisdiction: {jurisdiction}"
+)
+
 
 class StatutoryInterpreterAgent:
     """Agent for interpreting statutes, acts, and legal provisions"""
     
     def __init__(self):
         self.system_prompt = STATUTORY_INTERPRETATION_PROMPT
+        self.instructions = STATUTORY_INTERPRETATION_INSTRUCTIONS
     
     async def interpret_statute(
         self,
@@ -27,32 +35,14 @@ class StatutoryInterpreterAgent:
         """
         # Format context from retrieved chunks
         if retrieved_chunks:
-            context = "\n\n".join([
-                f"Legal Text:\n{chunk.get('text', '')}\n"
-                f"Source: {chunk.get('metadata', {}).get('title', 'Unknown')}\n"
-                f"Jurisdiction: {chunk.get('metadata', {}).get('jurisdiction', 'Unknown')}"
-                for chunk in retrieved_chunks[:3]
-            ])
+            context = format_chunks(retrieved_chunks, CONTEXT_TEMPLATE)
         else:
             context = "No specific documents found. Please use your general legal knowledge to answer."
         
         messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"""
-User Query: {query}
-
-Relevant Legal Provisions:
-{context}
-
-Provide:
-1. The exact legal text (if available from documents)
-2. Plain-language interpretation combining document info (if any) with general legal knowledge
-3. Key terms explained
-4. Cross-references if any
-5. Proper citations (if documents provided)
-
-Be clear, educational, and combine both document-specific and general legal knowledge.
-"""}
+            {"role": "user", "content": self.instructions},
+            {"role": "user", "content": f"User Query: {query}\n\nRelevant Legal Provisions:\n{context}"}
         ]
         
         try:
@@ -1,8 +1,28 @@
 """Verification & Citation Agent - Ensures response quality and citations"""
-import json
-from typing import Dict, Any, List
-from app.agents.prompts import VERIFICATION_CITATION_PROMPT
-from app.services.llm_service import llm_service
+import logging
+import re
+from typing import Dict, Any, List, Optional
+import numpy as np
+from pydantic import BaseModel
+from app.agents.prompts import VERIFICATION_CITATION_PROMPT, VERIFICATION_CITATION_INSTRUCTIONS
+from app.core.config import settings
+from app.services.embedding_service import embedding_service
+from app.services.llm_service import llm_service, parse_json_model
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+# Sentences shorter than this (headings, list labels) aren't checked
+_MIN_SENTENCE_WORDS = 5
+_MAX_SENTENCES = 64
+
+
+class VerificationResult(BaseModel):
+    """Expected shape of the verification model's JSON report"""
+    citations_valid: bool = False
+    unsupported_claims: List[str] = []
+    confidence_score: float = 0.7
+    verification_notes: str = ""
 
 
 class VerificationAgent:
@@ -10,6 +30,7 @@ class VerificationAgent:
     
     def __init__(self):
         self.system_prompt = VERIFICATION_CITATION_PROMPT
+        self.instructions = VERIFICATION_CITATION_INSTRUCTIONS
     
     async def verify_response(
         self,
@@ -28,6 +49,15 @@ class VerificationAgent:
         Returns:
             Dict with citations_valid, unsupported_claims, confidence_score, verification_notes
         """
+        if settings.VERIFICATION_EMBEDDING_PRECHECK and retrieved_chunks:
+            try:
+                verification = await self._verify_citations_embedding(response, retrieved_chunks)
+            except Exception as e:
+                logger.warning(f"Embedding verification failed, using LLM: {e}")
+                verification = None
+            if verification is not None:
+                return verification
+        
         # Format retrieved chunks for context
         sources_text = "\n\n".join([
             f"Source {i+1}:\n{chunk.get('text', '')}\nMetadata: {chunk.get('metadata', {})}"
@@ -36,51 +66,20 @@ class VerificationAgent:
         
         messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": f"""
-Verify this legal response:
-
-Original Query: {query}
-
-Response to Verify:
-{response}
-
-Available Source Documents:
-{sources_text}
-
-Check:
-1. Are all legal claims properly cited?
-2. Are there unsupported statements?
-3. Do citations match source documents?
-4. What is the confidence score (0.0-1.0)?
-
-Provide verification as JSON.
-"""}
+            {"role": "user", "content": self.instructions},
+            {"role": "user", "content": f"Original Query: {query}\n\nResponse to Verify:\n{response}\n\nAvailable Source Documents:\n{sources_text}"}
         ]
         
         try:
             llm_response = await llm_service.chat_completion(
                 messages=messages,
                 temperature=0.0,
-                max_tokens=500
+                max_tokens=500,
+                response_mime_type="application/json"
             )
             
-            content = llm_response["content"]
-            
-            # Extract JSON
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                json_str = content.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = content.strip()
-            
-            verification = json.loads(json_str)
-            
-            # Ensure confidence score is present
-            if "confidence_score" not in verification:
-                verification["confidence_score"] = 0.7
-            
-            return verification
+            # Missing fields take the schema defaults
+            return parse_json_model(llm_response["content"], VerificationResult).model_dump()
             
         except Exception as e:
             # Default verification on error
@@ -91,6 +90,73 @@ Provide verification as JSON.
                 "verification_notes": f"Verification failed: {str(e)}. Manual review recommended."
             }
     
+    async def _verify_citations_embedding(
+        self,
+        response: str,
+        retrieved_chunks: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Check that response sentences are supported by the source chunks
+        
+        Each sentence is matched to its most similar chunk by embedding
+        cosine similarity. Chunk vectors from retrieval are reused when
+        present, so usually only the sentences are embedded (one request).
+        
+        Args:
+            response: Generated response to verify
+            retrieved_chunks: Source chunks used for generation
+        
+        Returns:
+            Verification dict when the response is clearly grounded, or None
+            when too much is unsupported and the LLM verifier should decide
+        """
+        sentences = [
+            sentence.strip()
+            for sentence in _SENTENCE_SPLIT_RE.split(response)
+            if len(sentence.split()) >= _MIN_SENTENCE_WORDS
+        ][:_MAX_SENTENCES]
+        if not sentences:
+            return None
+        
+        chunk_vectors = [chunk.get("embedding") for chunk in retrieved_chunks]
+        if any(vector is None for vector in chunk_vectors):
+            embeddings = await embedding_service.embed_texts(
+                sentences + [chunk.get("text", "") for chunk in retrieved_chunks]
+            )
+            sentence_vectors = embeddings[:len(sentences)]
+            chunk_vectors = embeddings[len(sentences):]
+        else:
+            sentence_vectors = await embedding_service.embed_texts(sentences)
+        
+        sentence_matrix = self._normalize(np.asarray(sentence_vectors, dtype=np.float32))
+        chunk_matrix = self._normalize(np.asarray(chunk_vectors, dtype=np.float32))
+        best_scores = (sentence_matrix @ chunk_matrix.T).max(axis=1)
+        
+        supported = best_scores >= settings.VERIFICATION_SIMILARITY_THRESHOLD
+        unsupported_claims = [s for s, ok in zip(sentences, supported) if not ok]
+        supported_ratio = float(supported.mean())
+        
+        if (
+            len(unsupported_claims) > settings.VERIFICATION_MAX_UNSUPPORTED
+            or supported_ratio < settings.VERIFICATION_MIN_SUPPORTED_RATIO
+        ):
+            return None
+        
+        return {
+            "citations_valid": True,
+            "unsupported_claims": unsupported_claims,
+            "confidence_score": round(supported_ratio, 2),
+            "verification_notes": (
+                f"{int(supported.sum())} of {len(sentences)} statements matched source "
+                f"documents by semantic similarity."
+            )
+        }
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+    
     def is_high_confidence(self, verification: Dict[str, Any], threshold: float = 0.6) -> bool:
         """Check if response meets confidence threshold"""
         return verification.get("confidence_score", 0.0) >= threshold
@@ -1,8 +1,10 @@
 """Authentication API routes"""
+import asyncio
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from app.db.base import get_db
 from app.core.security import (
     verify_password,
@@ -12,7 +14,7 @@ from app.core.security import (
     decode_token,
     verify_token_type
 )
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, invalidate_cached_user
 from app.models.user import User, UserRole
 from app.models.organization import Organization
 from app.api.schemas import UserRegister, UserLogin, Token, TokenRefresh, UserResponse
@@ -28,31 +30,36 @@ async def register(
 ):
     """Register new user and organization"""
     
-    # Check if user already exists
-    result = await db.execute(select(User).where(User.email == user_data.email))
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     # Create organization
     organization = Organization(name=user_data.organization_name)
     db.add(organization)
     await db.flush()  # Get organization ID
     
-    # Create user as admin of new organization
-    user = User(
-        email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
-        full_name=user_data.full_name,
-        role=UserRole.ADMIN,
-        organization_id=organization.id,
-        is_active=True
+    # Create user as admin of new organization; the unique email constraint
+    # replaces a separate existence check and closes the check/insert race
+    result = await db.execute(
+        insert(User)
+        .values(
+            email=user_data.email,
+            hashed_password=await asyncio.to_thread(get_password_hash, user_data.password),
+            full_name=user_data.full_name,
+            role=UserRole.ADMIN,
+            organization_id=organization.id,
+            is_active=True
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
     )
-    db.add(user)
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
     await db.commit()
-    await db.refresh(user)
     
     # Generate tokens
     token_data = {
@@ -78,11 +85,12 @@ async def login(
 ):
     """Login user"""
     
-    # Find user
+    # Find user with a plain read; rejected logins never write or lock the row
     result = await db.execute(select(User).where(User.email == credentials.email))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not user or not await asyncio.to_thread(verify_password, credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -95,9 +103,14 @@ async def login(
             detail="Inactive user account"
         )
     
-    # Update last login
-    user.last_login = datetime.utcnow()
+    # Record the login only once it has succeeded
+    await db.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(last_login=datetime.utcnow())
+    )
     await db.commit()
+    await invalidate_cached_user(user.id)  # last_login changed
     
     # Generate tokens
     token_data = {
@@ -127,11 +140,10 @@ async def refresh_token(
         payload = decode_token(token_data.refresh_token)
         verify_token_type(payload, "refresh")
         
-        user_id = payload.get("sub")
+        user_id = int(payload.get("sub"))
         
         # Verify user still exists and is active
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
+        user = await db.get(User, user_id)
         
         if not user or not user.is_active:
             raise HTTPException(
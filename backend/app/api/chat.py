@@ -1,22 +1,25 @@
 """Legal chat API with multi-agent system"""
+import asyncio
 import time
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Dict, List, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.base import get_db
+from app.db.base import get_db, AsyncSessionLocal
+from app.core.config import settings
 from app.core.dependencies import get_current_user, get_current_organization
 from app.models.user import User
 from app.models.organization import Organization
 from app.models.query_history import QueryHistory
 from app.api.schemas import ChatQuery, ChatResponse, Citation
-from app.agents.orchestrator import orchestrator_agent
+from app.agents.orchestrator import orchestrator_agent, SPECIALIST_AGENTS
 from app.agents.safety_agent import safety_agent
 from app.agents.verification_agent import verification_agent
 from app.agents.retriever import retriever_agent
-from app.agents.statutory_interpreter import statutory_interpreter_agent
-from app.agents.case_law_researcher import case_law_researcher_agent
-from app.agents.contract_analyzer import contract_analyzer_agent
-from app.agents.compliance_agent import compliance_agent
+from app.agents.context import format_chunks
+from app.services.document_versions import document_versions
+from app.services.embedding_service import embedding_service
+from app.services.semantic_cache import SemanticCache
 import logging
 import traceback
 
@@ -25,10 +28,74 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+HYBRID_CONTEXT_TEMPLATE = "Document: {title}\n{text}"
+
+# Global chat response cache, partitioned per organization, document set
+# version and request options
+response_cache = SemanticCache(
+    threshold=settings.CHAT_CACHE_SIMILARITY_THRESHOLD,
+    max_entries=settings.CHAT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CHAT_CACHE_TTL_SECONDS,
+    dimensions=settings.SIMILARITY_EMBEDDING_DIMENSIONS
+)
+
+
+def _materialize_chunks(
+    chunks: List[Dict[str, Any]],
+    limit: int = 3
+) -> Tuple[str, List[Citation], List[Dict[str, Any]]]:
+    """
+    Build the hybrid prompt context and citations for the top chunks
+    
+    Args:
+        chunks: Retrieved chunks with 'text' and 'metadata'
+        limit: Number of top chunks to use
+    
+    Returns:
+        Tuple of (context string, citations, citations as JSON-ready dicts)
+    """
+    citations = []
+    citation_dicts = []
+    for chunk in chunks[:limit]:
+        metadata = chunk["metadata"]
+        citation = Citation(
+            source=metadata.get("title", "Unknown"),
+            text=chunk["text"][:200] + "...",
+            metadata=metadata
+        )
+        citations.append(citation)
+        citation_dicts.append(citation.model_dump(mode="json"))
+    
+    context = ""
+    if chunks:
+        context = (
+            "\n\n--- RELEVANT DOCUMENTS ---\n\n"
+            + format_chunks(chunks, HYBRID_CONTEXT_TEMPLATE, limit)
+            + "\n\n--- END DOCUMENTS ---\n\n"
+        )
+    return context, citations, citation_dicts
+
+
+async def _allocate_history_id(db: AsyncSession) -> int:
+    """Reserve the next query history ID so the row can be written later"""
+    result = await db.execute(text("SELECT nextval(pg_get_serial_sequence('query_history', 'id'))"))
+    return result.scalar_one()
+
+
+async def _persist_history(query_history: QueryHistory) -> None:
+    """Insert a query history row in its own session after the response is sent"""
+    try:
+        async with AsyncSessionLocal() as session:
+            session.add(query_history)
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Failed to save query history {query_history.id}: {str(e)}")
+
 
 @router.post("/query", response_model=ChatResponse)
 async def submit_query(
     query_data: ChatQuery,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     organization: Organization = Depends(get_current_organization),
     db: AsyncSession = Depends(get_db)
@@ -38,28 +105,85 @@ async def submit_query(
     try:
         start_time = time.time()
         
-        import asyncio
-
-        # Execute independent tasks in parallel
-        # 1. Safety Check (Gatekeeper)
-        # 2. Intent Classification (Router)
-        # 3. Retrieval (Context)
+        # Step 0: Answer from cache if a near-identical query was recently
+        # answered over the organization's current documents
+        query_embedding = None
+        documents_version = 0
+        if settings.CHAT_CACHE_ENABLED:
+            try:
+                query_embedding, documents_version = await asyncio.gather(
+                    embedding_service.embed_query(query_data.query),
+                    document_versions.get(organization.id)
+                )
+            except Exception as e:
+                logger.warning(f"Chat cache lookup failed, skipping cache: {e}")
+                query_embedding = None
+        cache_namespace = (
+            f"{organization.id}|{documents_version}|{query_data.jurisdiction}|{query_data.include_citations}"
+        )
         
-        tasks = [
-            safety_agent.check_safety(query=query_data.query, jurisdiction=query_data.jurisdiction),
-            orchestrator_agent.classify_intent(query_data.query),
-            retriever_agent.retrieve_with_mmr(
+        cached = response_cache.get_similar(cache_namespace, query_embedding) if query_embedding is not None else None
+        safety_result = None
+        if cached is not None:
+            # Hits are still gated; only answers to queries that pass are served
+            safety_result = await safety_agent.check_safety(query=query_data.query, jurisdiction=query_data.jurisdiction)
+            if safety_result.get("safety_check") != "PASS":
+                cached = None
+        
+        if cached is not None:
+            response_time_ms = int((time.time() - start_time) * 1000)
+            query_history = QueryHistory(
+                id=await _allocate_history_id(db),
                 organization_id=organization.id,
+                user_id=current_user.id,
                 query=query_data.query,
-                jurisdiction=query_data.jurisdiction,
-                top_k=5
+                response=cached["response"],
+                intent_classification=cached["intent"],
+                agents_used=cached["agents_used"],
+                citations=cached["citations"],
+                confidence_score=cached["confidence_score"],
+                total_tokens=0,
+                cost_estimate=0.0,
+                response_time_ms=response_time_ms,
+                safety_triggered=None
+            )
+            background_tasks.add_task(_persist_history, query_history)
+            
+            return ChatResponse(
+                **cached,
+                query_id=query_history.id,
+                query=query_data.query,
+                tokens_used=0,
+                cost_estimate=0.0,
+                response_time_ms=response_time_ms
             )
-        ]
         
-        results = await asyncio.gather(*tasks)
-        safety_result, classification, retrieved_chunks = results[0], results[1], results[2]
+        # Execute independent tasks in parallel
+        # 1. Safety Check (Gatekeeper)
+        # 2. Intent Classification (Router)
+        # 3. Retrieval (Context)
+        # Classification and retrieval start speculatively and are cancelled on refusal
+        classify_task = asyncio.create_task(orchestrator_agent.classify_intent(query_data.query))
+        retrieve_task = asyncio.create_task(retriever_agent.retrieve_with_mmr(
+            organization_id=organization.id,
+            query=query_data.query,
+            jurisdiction=query_data.jurisdiction,
+            top_k=5,
+            text_max_chars=settings.CONTEXT_CHUNK_MAX_CHARS
+        ))
+        
+        try:
+            if safety_result is None:
+                safety_result = await safety_agent.check_safety(query=query_data.query, jurisdiction=query_data.jurisdiction)
+        except BaseException:
+            classify_task.cancel()
+            retrieve_task.cancel()
+            raise
         
         if safety_agent.should_refuse(safety_result):
+            classify_task.cancel()
+            retrieve_task.cancel()
+            
             # Refuse the request
             return ChatResponse(
                 query_id=0,
@@ -76,6 +200,8 @@ async def submit_query(
                 response_time_ms=int((time.time() - start_time) * 1000)
             )
         
+        classification, retrieved_chunks = await asyncio.gather(classify_task, retrieve_task)
+        
         # Step 4: Route to appropriate specialist agent
         intent = classification.get("intent", "general_legal")
         if not isinstance(intent, str):
@@ -97,69 +223,42 @@ async def submit_query(
                     logger.info("Switching intent from contract_analysis to case_law_research based on text content")
                     intent = "case_law_research"
         
+        # Context from retrieved documents (if any) and their citations
+        context, citations, citation_dicts = _materialize_chunks(retrieved_chunks)
+        if not query_data.include_citations:
+            citations, citation_dicts = [], []
+        
         response_text = ""
         total_tokens = 0
         total_cost = 0.0
         agents_used = ["orchestrator", "safety", "retriever"]
         
         # Always pass retrieved_chunks to agents (even if empty) so they can combine with general knowledge
-        if intent == "statutory_interpretation":
-            result = await statutory_interpreter_agent.interpret_statute(
-                query=query_data.query,
-                retrieved_chunks=retrieved_chunks  # Pass even if empty
-            )
-            response_text = result.get("interpretation", "")
-            total_tokens += result.get("tokens_used", 0)
-            total_cost += result.get("cost", 0.0)
-            agents_used.append("statutory_interpreter")
-            
-        elif intent == "case_law_research":
-            result = await case_law_researcher_agent.research_case_law(
-                query=query_data.query,
-                retrieved_chunks=retrieved_chunks  # Pass even if empty
-            )
-            response_text = result.get("case_analysis", "")
-            total_tokens += result.get("tokens_used", 0)
-            total_cost += result.get("cost", 0.0)
-            agents_used.append("case_law_researcher")
-            
-        elif intent == "contract_analysis":
+        if intent in SPECIALIST_AGENTS:
             # If we have retrieved chunks, use them as the contract text
             contract_text_input = query_data.query
-            if retrieved_chunks:
+            if intent == "contract_analysis" and retrieved_chunks:
                 contract_text_input = "\n\n".join([chunk["text"] for chunk in retrieved_chunks])
             
-            result = await contract_analyzer_agent.analyze_contract(
+            agent_results = await orchestrator_agent.run_agents(
                 query=query_data.query,
-                contract_text=contract_text_input
+                intents=[intent],
+                chunks=retrieved_chunks,  # Pass even if empty
+                contract_text=contract_text_input,
+                organization_id=organization.id
             )
-            response_text = result.get("contract_analysis", "")
+            agent_name, response_key = SPECIALIST_AGENTS[intent]
+            result = agent_results[agent_name]
+            response_text = result.get(response_key, "")
             total_tokens += result.get("tokens_used", 0)
             total_cost += result.get("cost", 0.0)
-            agents_used.append("contract_analyzer")
+            agents_used.append(agent_name)
             
-        elif intent == "compliance_check":
-            result = await compliance_agent.check_compliance(
-                query=query_data.query,
-                retrieved_chunks=retrieved_chunks  # Pass even if empty
-            )
-            response_text = result.get("compliance_analysis", "")
-            total_tokens += result.get("tokens_used", 0)
-            total_cost += result.get("cost", 0.0)
-            agents_used.append("compliance_agent")
         else:
             # Hybrid approach: ALWAYS combine documents with general knowledge
             from app.agents.prompts import HYBRID_LEGAL_PROMPT
             from app.services.llm_service import llm_service
             
-            # Build context from retrieved documents (if any)
-            context = ""
-            if retrieved_chunks:
-                context = "\n\n--- RELEVANT DOCUMENTS ---\n\n"
-                context += "\n\n".join([f"Document: {chunk['metadata'].get('title', 'Unknown')}\n{chunk['text']}" 
-                                         for chunk in retrieved_chunks[:3]])
-                context += "\n\n--- END DOCUMENTS ---\n\n"
-            
             # Always use hybrid legal agent to combine document info with general knowledge
             hybrid_response = await llm_service.chat_completion(
                 messages=[
@@ -173,45 +272,49 @@ async def submit_query(
             total_cost += hybrid_response.get("cost", 0.0)
             agents_used.append("hybrid_legal_agent")
         
-        # Step 5: Verification
-        verification = await verification_agent.verify_response(
-            query=query_data.query,
-            response=response_text,
-            retrieved_chunks=retrieved_chunks
+        # Step 5: Verification, overlapped with reserving the history row ID
+        verification, history_id = await asyncio.gather(
+            verification_agent.verify_response(
+                query=query_data.query,
+                response=response_text,
+                retrieved_chunks=retrieved_chunks
+            ),
+            _allocate_history_id(db)
         )
         agents_used.append("verification")
         
         # Step 6: Add disclaimer
         final_response = f"{response_text}\n\n---\n\n{safety_result['disclaimer_text']}"
         
-        # Step 7: Extract citations
-        citations = [
-            Citation(
-                source=chunk["metadata"].get("title", "Unknown"),
-                text=chunk["text"][:200] + "...",
-                metadata=chunk["metadata"]
-            )
-            for chunk in retrieved_chunks[:3]
-        ] if query_data.include_citations else []
-        
-        # Step 8: Save to query history
+        # Step 7: Save to query history (written after the response is sent)
         query_history = QueryHistory(
+            id=history_id,
             organization_id=organization.id,
             user_id=current_user.id,
             query=query_data.query,
             response=final_response,
             intent_classification=intent,
             agents_used=agents_used,
-            citations=[c.dict() for c in citations],
+            citations=citation_dicts,
             confidence_score=verification.get("confidence_score", 0.0),
             total_tokens=total_tokens,
             cost_estimate=total_cost,
             response_time_ms=int((time.time() - start_time) * 1000),
             safety_triggered=safety_result.get("safety_check") if safety_result.get("safety_check") != "PASS" else None
         )
-        db.add(query_history)
-        await db.commit()
-        await db.refresh(query_history)
+        background_tasks.add_task(_persist_history, query_history)
+        
+        # Only cache clean answers; warnings depend on the exact wording
+        if query_embedding is not None and safety_result.get("safety_check") == "PASS":
+            response_cache.set_similar(cache_namespace, query_embedding, {
+                "response": final_response,
+                "intent": intent,
+                "agents_used": agents_used,
+                "citations": citation_dicts,
+                "confidence_score": verification.get("confidence_score", 0.0),
+                "safety_check": safety_result["safety_check"],
+                "disclaimer": safety_result["disclaimer_text"]
+            })
         
         return ChatResponse(
             query_id=query_history.id,
@@ -1,58 +1,164 @@
 """Document management API"""
-import os
-import shutil
-from pathlib import Path
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, BackgroundTasks
+import asyncio
+import hashlib
+import logging
+import time
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response, status, BackgroundTasks
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.base import get_db, AsyncSessionLocal
-from sqlalchemy import select, func
+from app.db.base import get_db, get_db_ro, AsyncSessionLocal
+from sqlalchemy import delete, or_, select, func, tuple_, update
+from pydantic import TypeAdapter
 from app.core.dependencies import get_current_user, get_current_organization, require_upload_permission
 from app.core.config import settings
+from app.core.redis import redis_client
 from app.models.user import User
 from app.models.organization import Organization
 from app.models.document import Document, DocumentType, CourtLevel
-from app.api.schemas import DocumentResponse
+from app.api.schemas import DocumentResponse, DocumentStatusResponse
 from app.rag.document_processor import document_processor
 from app.rag.chunker import legal_chunker
 from app.rag.vector_store import vector_store
+from app.services.document_versions import document_versions
 from app.services.s3_service import s3_service
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+# Allowance for multipart boundaries and form fields in Content-Length
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def _sha256_file(fileobj: BinaryIO) -> Tuple[str, int]:
+    """Hash a file from the start, leaving it rewound; returns (hex digest, size)"""
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    while block := fileobj.read(_HASH_BLOCK_SIZE):
+        digest.update(block)
+        size += len(block)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def _batched(chunks: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group chunks into lists of up to size, consuming the input lazily"""
+    iterator = iter(chunks)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _status_key(document_id: int) -> str:
+    return f"doc:{document_id}:status"
+
+
+async def _set_processing_status(db: AsyncSession, document: Document, processing_status: str) -> None:
+    """
+    Record an intermediate processing stage
+    
+    Stages are ephemeral progress, so they go to Redis and the row is only
+    written once processing ends. Without Redis the row is updated directly.
+    """
+    if redis_client.redis:
+        try:
+            await redis_client.redis.set(
+                _status_key(document.id),
+                processing_status,
+                ex=settings.DOCUMENT_STATUS_TTL_SECONDS
+            )
+            return
+        except Exception:
+            pass
+    document.processing_status = processing_status
+    await db.commit()
+
+
+async def _get_processing_statuses(document_ids: List[int]) -> Dict[int, str]:
+    """Return live processing stages recorded in Redis, by document ID"""
+    if not redis_client.redis or not document_ids:
+        return {}
+    try:
+        values = await redis_client.redis.mget([_status_key(i) for i in document_ids])
+    except Exception:
+        return {}
+    return {i: value.decode() for i, value in zip(document_ids, values) if value}
+
+
+async def _clear_processing_status(document_id: int) -> None:
+    if not redis_client.redis:
+        return
+    try:
+        await redis_client.redis.delete(_status_key(document_id))
+    except Exception:
+        pass
+
+
+# Documents processed at once per organization; the rest wait their turn
+_org_semaphores: Dict[int, asyncio.Semaphore] = {}
+
+
+def _processing_lease_until() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.DOCUMENT_PROCESSING_LEASE_SECONDS)
+
+
+def _get_org_semaphore(organization_id: int) -> asyncio.Semaphore:
+    semaphore = _org_semaphores.get(organization_id)
+    if semaphore is None:
+        semaphore = _org_semaphores[organization_id] = asyncio.Semaphore(settings.MAX_CONCURRENT_EMBED_PER_ORG)
+    return semaphore
+
+
 async def process_document_task(
     document_id: int,
     file_path: str,
     organization_id: int
 ):
     """Background task to process document"""
-    import logging
-    import time
-    import gc
-    from app.services.embedding_service import embedding_service
-    
-    logger = logging.getLogger(__name__)
+    # Simultaneous uploads would otherwise each run a full embedding
+    # pipeline against the same Gemini rate limit
+    async with _get_org_semaphore(organization_id):
+        await _process_document(document_id, file_path, organization_id)
+
+
+async def _process_document(
+    document_id: int,
+    file_path: str,
+    organization_id: int
+):
     logger.info(f"Starting processing for document {document_id}")
     task_start = time.time()
     
     async with AsyncSessionLocal() as db:
+        tasks = []
         try:
             # Re-fetch document to ensure attached session
-            result = await db.execute(select(Document).where(Document.id == document_id))
-            document = result.scalar_one_or_none()
+            document = await db.get(Document, document_id)
             
             if not document:
                 logger.error(f"Document {document_id} not found")
                 return
+            
+            # Time spent queued behind the organization's semaphore doesn't
+            # count against the lease
+            document.processing_lease_until = _processing_lease_until()
+            await db.commit()
+            
+            # An interrupted run may have persisted some of this document's
+            # chunks along with another document's; start from none
+            if await vector_store.delete_document(organization_id, document_id):
+                logger.info(f"Document {document_id}: Removed chunks from an interrupted run")
 
             # Extract text
             logger.info(f"Document {document_id}: Extracting text from {document.filename}")
             extract_start = time.time()
-            document.processing_status = "extracting"
-            await db.commit()
-            text = document_processor.extract_text(str(file_path))
+            await _set_processing_status(db, document, "extracting")
+            text = await document_processor.extract_text_async(str(file_path))
             extract_time = time.time() - extract_start
             logger.info(f"Document {document_id}: Extracted {len(text)} characters in {extract_time:.1f}s")
             
@@ -64,12 +170,12 @@ async def process_document_task(
                 if not document.year:
                     document.year = extracted_metadata.get("year")
             
-            # Chunk document
-            logger.info(f"Document {document_id}: Chunking document")
-            chunk_start = time.time()
-            document.processing_status = "chunking"
-            await db.commit()
-            chunks = legal_chunker.chunk_document(
+            # Chunk lazily and embed in bounded parallel batches, so only a few
+            # batches of chunks are resident at once; the index is saved once
+            logger.info(f"Document {document_id}: Chunking and embedding")
+            embed_start = time.time()
+            await _set_processing_status(db, document, "embedding")
+            chunks = legal_chunker.iter_chunks(
                 text=text,
                 metadata={
                     "document_id": document.id,
@@ -81,85 +187,164 @@ async def process_document_task(
                     "document_type": document.document_type.value
                 }
             )
-            chunk_time = time.time() - chunk_start
-            logger.info(f"Document {document_id}: Created {len(chunks)} chunks in {chunk_time:.1f}s")
-            
-            # Free up memory: Original huge text string is no longer needed
+            # The chunk generator now holds the only reference, so the text is
+            # freed by refcounting as soon as chunking finishes
             del text
-            gc.collect()
             
-            for chunk in chunks:
-                chunk["metadata"]["text"] = chunk["text"]
+            semaphore = asyncio.Semaphore(settings.INGEST_MAX_CONCURRENT_BATCHES)
             
-            # Add to vector store
-            logger.info(f"Document {document_id}: Starting embedding for {len(chunks)} chunks")
-            embed_start = time.time()
-            document.processing_status = "embedding"
-            await db.commit()
+            async def add_batch(batch):
+                try:
+                    return await vector_store.add_documents(
+                        organization_id=organization_id,
+                        chunks=batch,
+                        persist=False
+                    )
+                finally:
+                    semaphore.release()
             
-            success = await vector_store.add_documents(
-                organization_id=organization_id,
-                chunks=chunks
-            )
+            chunk_count = 0
+            for batch in _batched(chunks, settings.INGEST_BATCH_SIZE):
+                await semaphore.acquire()
+                chunk_count += len(batch)
+                tasks.append(asyncio.create_task(add_batch(batch)))
+            results = await asyncio.gather(*tasks)
+            
+            # Deleted while processing: drop the chunks rather than save them for
+            # a row that is gone. Later deletes queue their own removal, which
+            # runs after these batches are already in.
+            still_exists = await db.scalar(select(Document.id).where(Document.id == document_id))
+            if still_exists is None:
+                await vector_store.delete_document(organization_id, document_id)
+                logger.info(f"Document {document_id}: Deleted during processing, discarded its chunks")
+                return
+            
+            success = all(results) and await vector_store.persist(organization_id)
             embed_time = time.time() - embed_start
+            logger.info(f"Document {document_id}: Embedded {chunk_count} chunks in {embed_time:.1f}s")
             
             if success:
                 document.processing_status = "completed"
                 document.processed = True
-                document.chunk_count = len(chunks)
-                from datetime import datetime
+                document.chunk_count = chunk_count
                 document.processed_at = datetime.utcnow()
                 
                 total_time = time.time() - task_start
                 logger.info(f"Document {document_id}: Processing completed successfully in {total_time:.1f}s "
-                          f"(extract: {extract_time:.1f}s, chunk: {chunk_time:.1f}s, embed: {embed_time:.1f}s)")
+                          f"(extract: {extract_time:.1f}s, chunk + embed: {embed_time:.1f}s)")
             else:
+                # Batches that did go in would be saved by the organization's
+                # next persist, leaving a failed document partly searchable
+                await vector_store.delete_document(organization_id, document_id)
+                document.processing_status = "failed"
                 document.processing_error = "Failed to add to vector store"
                 logger.error(f"Document {document_id}: Failed to add to vector store")
             
+            # Single write of the final state
             await db.commit()
             
+            if success:
+                # New chunks are searchable; answers cached without them are stale
+                await document_versions.bump(organization_id)
+            
         except Exception as e:
             logger.error(f"Document {document_id}: Processing failed with error: {e}", exc_info=True)
+            # Let in-flight batches land before removing everything they added
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await vector_store.delete_document(organization_id, document_id)
+            document.processing_status = "failed"
             document.processing_error = str(e)
             await db.commit()
+        finally:
+            await _clear_processing_status(document_id)
+
+
+# Strong references so resumed tasks aren't garbage collected mid-run
+_resumed_tasks: Set[asyncio.Task] = set()
+
+
+async def resume_interrupted_documents() -> int:
+    """
+    Reschedule documents whose processing never finished
+    
+    Processing runs in the web process, so a restart or crash drops any
+    in-flight job. The document row is the durable record: it only leaves
+    the unprocessed state with a final success or error. Rows are claimed
+    with a single UPDATE, and only once the processing lease of whichever
+    process held them has run out, so overlapping deploys don't both
+    process the same document.
+    
+    Returns:
+        Number of documents rescheduled
+    """
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Document)
+            .where(
+                Document.processed.is_(False),
+                Document.processing_error.is_(None),
+                or_(
+                    Document.processing_lease_until.is_(None),
+                    Document.processing_lease_until < now
+                )
+            )
+            .values(processing_lease_until=_processing_lease_until())
+            .returning(Document.id, Document.file_path, Document.organization_id)
+            .execution_options(synchronize_session=False)
+        )
+        pending = sorted(result.all())
+        await db.commit()
+    
+    for document_id, file_path, organization_id in pending:
+        task = asyncio.create_task(process_document_task(document_id, file_path, organization_id))
+        _resumed_tasks.add(task)
+        task.add_done_callback(_resumed_tasks.discard)
+    
+    if pending:
+        logger.info(f"Resumed processing for {len(pending)} interrupted documents")
+    return len(pending)
 
 
 @router.post("/upload", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
 async def upload_document(
+    request: Request,
+    response: Response,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     jurisdiction: str = Form(None),
-    document_type: str = Form("other"),
-    court_level: str = Form("not_applicable"),
+    document_type: DocumentType = Form(DocumentType.OTHER),
+    court_level: CourtLevel = Form(CourtLevel.NOT_APPLICABLE),
     year: int = Form(None),
     title: str = Form(None),
     current_user: User = Depends(require_upload_permission),
     organization: Organization = Depends(get_current_organization),
     db: AsyncSession = Depends(get_db)
 ):
-    """Upload legal document"""
+    """
+    Upload legal document
+    
+    Re-uploading a file the organization already has (same SHA-256) returns
+    the existing document with 200 instead of storing and embedding it again.
+    """
     
     # Validate file extension
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in settings.ALLOWED_EXTENSIONS:
+    dot = file.filename.rfind(".")
+    file_ext = file.filename[dot:].lower() if dot >= 0 else ""
+    if file_ext not in settings.ALLOWED_EXTENSIONS_SET:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File type {file_ext} not allowed. Allowed: {settings.ALLOWED_EXTENSIONS}"
         )
     
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset
-    
-    max_size_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
-    if file_size > max_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Max size: {settings.MAX_UPLOAD_SIZE_MB}MB"
-        )
-    
+    # Preflight size check from the request header; hashing measures the exact size
+    too_large = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"File too large. Max size: {settings.MAX_UPLOAD_SIZE_MB}MB"
+    )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD_BYTES:
+        raise too_large
     
     # Save file to S3
     if not s3_service.enabled:
@@ -167,31 +352,65 @@ async def upload_document(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="S3 is not enabled. Please configure AWS credentials."
         )
-
-    file_path = f"org_{organization.id}/{file.filename}"
-    if not await s3_service.upload_file(file, file_path):
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to upload file to S3"
-        )
     
+    # Skip the upload and embedding entirely for content already ingested
+    sha256, file_size = await asyncio.to_thread(_sha256_file, file.file)
+    if file_size > settings.MAX_UPLOAD_BYTES:
+        raise too_large
+    result = await db.execute(
+        select(Document)
+        .where(
+            Document.organization_id == organization.id,
+            Document.sha256 == sha256,
+            Document.processing_error.is_(None)
+        )
+        .limit(1)
+    )
+    existing = result.scalar_one_or_none()
+    if existing:
+        response.status_code = status.HTTP_200_OK
+        return existing
+
     # Create document record
+    file_path = f"org_{organization.id}/{file.filename}"
     document = Document(
         organization_id=organization.id,
         uploaded_by=current_user.id,
         filename=file.filename,
-        file_path=str(file_path),
+        file_path=file_path,
         file_size_bytes=file_size,
         file_type=file_ext,
-        document_type=DocumentType(document_type),
+        sha256=sha256,
+        document_type=document_type,
         jurisdiction=jurisdiction,
-        court_level=CourtLevel(court_level),
+        court_level=court_level,
         year=year,
         title=title or file.filename,
-        processed=False
+        processed=False,
+        processing_lease_until=_processing_lease_until()
     )
     db.add(document)
-    await db.commit()
+    
+    # The row only needs the key, so the S3 PUT and the INSERT run side by side
+    uploaded, committed = await asyncio.gather(
+        s3_service.upload_file(file, file_path),
+        db.commit(),
+        return_exceptions=True
+    )
+    if isinstance(committed, BaseException):
+        if isinstance(uploaded, int):
+            await asyncio.to_thread(s3_service.delete_file, file_path)
+        raise committed
+    if not isinstance(uploaded, int):
+        if isinstance(uploaded, BaseException):
+            logger.error(f"Failed to upload {file_path}: {uploaded}")
+        await db.delete(document)
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to upload file to S3"
+        )
+    
     await db.refresh(document)
     
     # Add processing to background tasks
@@ -205,22 +424,73 @@ async def upload_document(
     return document
 
 
+# Only the columns DocumentResponse exposes; rows are returned as plain
+# mappings, and listings are serialized without per-item validation
+_RESPONSE_COLUMNS = tuple(getattr(Document, name) for name in DocumentResponse.model_fields)
+_LIST_ADAPTER = TypeAdapter(List[DocumentResponse])
+
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    return f"{row['uploaded_at'].isoformat()},{row['id']}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        uploaded_at, document_id = cursor.rsplit(",", 1)
+        return datetime.fromisoformat(uploaded_at), int(document_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def _overlay_processing_statuses(documents: List[Dict[str, Any]]) -> None:
+    """Replace stored stages with live ones for documents still being processed"""
+    live = await _get_processing_statuses([d["id"] for d in documents if not d["processed"]])
+    for document in documents:
+        if document["id"] in live:
+            document["processing_status"] = live[document["id"]]
+
+
 @router.get("", response_model=List[DocumentResponse])
 async def list_documents(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     organization: Organization = Depends(get_current_organization),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
-    """List organization's documents"""
+    """
+    List organization's documents, newest first
     
-    result = await db.execute(
-        select(Document)
+    Pages are keyed on (uploaded_at, id). When more documents exist, the
+    X-Next-Cursor response header holds the cursor for the next page.
+    """
+    
+    query = (
+        select(*_RESPONSE_COLUMNS)
         .where(Document.organization_id == organization.id)
-        .order_by(Document.uploaded_at.desc())
+        .order_by(Document.uploaded_at.desc(), Document.id.desc())
+        .limit(limit + 1)
     )
-    documents = result.scalars().all()
+    if cursor:
+        query = query.where(tuple_(Document.uploaded_at, Document.id) < _decode_cursor(cursor))
+    
+    result = await db.execute(query)
+    documents = [dict(row) for row in result.mappings()]
+    
+    # The extra row only tells us whether another page exists
+    headers = {}
+    if len(documents) > limit:
+        documents = documents[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(documents[-1])
     
-    return documents
+    await _overlay_processing_statuses(documents)
+    # Rows already have the schema's columns and types; returning a Response
+    # skips FastAPI's per-item validation against response_model
+    content = _LIST_ADAPTER.dump_json([DocumentResponse.model_construct(**d) for d in documents])
+    return Response(content=content, media_type="application/json", headers=headers)
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
@@ -228,70 +498,172 @@ async def get_document(
     document_id: int,
     organization: Organization = Depends(get_current_organization),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get document details"""
     
     result = await db.execute(
-        select(Document)
+        select(*_RESPONSE_COLUMNS)
         .where(
             Document.id == document_id,
             Document.organization_id == organization.id
         )
     )
-    document = result.scalar_one_or_none()
+    row = result.mappings().one_or_none()
     
-    if not document:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
     
+    document = dict(row)
+    await _overlay_processing_statuses([document])
     return document
 
 
-@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_document(
+@router.get("/{document_id}/status", response_model=DocumentStatusResponse)
+async def get_document_status(
     document_id: int,
     organization: Organization = Depends(get_current_organization),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
-    """Delete document"""
+    """Get document processing status, preferring the live stage from Redis"""
+    
+    result = await db.execute(
+        select(Document.processed, Document.processing_status, Document.processing_error)
+        .where(
+            Document.id == document_id,
+            Document.organization_id == organization.id
+        )
+    )
+    row = result.one_or_none()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    processing_status = row.processing_status
+    if not row.processed:
+        live = await _get_processing_statuses([document_id])
+        processing_status = live.get(document_id, processing_status)
     
-    if not current_user.can_delete_documents:
+    return DocumentStatusResponse(
+        id=document_id,
+        processed=row.processed,
+        processing_status=processing_status,
+        processing_error=row.processing_error
+    )
+
+
+async def _remove_from_vector_store(organization_id: int, document_ids: List[int]) -> None:
+    """Drop deleted documents' chunks from the index and save it once"""
+    removed = False
+    for document_id in document_ids:
+        removed = await vector_store.delete_document(organization_id, document_id) or removed
+    if removed:
+        await vector_store.persist(organization_id)
+        # Answers cached between the delete and now may still cite the chunks
+        await document_versions.bump(organization_id)
+
+
+def _require_delete_permission(user: User) -> None:
+    if not user.can_delete_documents:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions to delete documents"
         )
+
+
+@router.delete("", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_documents(
+    background_tasks: BackgroundTasks,
+    ids: str = Query(..., description="Comma-separated document IDs"),
+    organization: Organization = Depends(get_current_organization),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete several documents; their files are removed from S3 in batches"""
+    
+    _require_delete_permission(current_user)
+    
+    try:
+        document_ids = {int(i) for i in ids.split(",") if i.strip()}
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers"
+        )
+    if not document_ids or len(document_ids) > settings.MAX_BULK_DELETE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {settings.MAX_BULK_DELETE} document IDs"
+        )
     
     result = await db.execute(
-        select(Document)
+        delete(Document)
+        .where(
+            Document.id.in_(document_ids),
+            Document.organization_id == organization.id
+        )
+        .returning(Document.id, Document.file_path)
+    )
+    deleted = result.all()
+    await db.commit()
+    
+    if deleted:
+        await document_versions.bump(organization.id)
+    
+    # Index and storage cleanup don't need to hold up the response
+    if deleted:
+        background_tasks.add_task(
+            _remove_from_vector_store,
+            organization.id,
+            [document_id for document_id, _ in deleted]
+        )
+    if deleted and s3_service.enabled:
+        background_tasks.add_task(s3_service.delete_files, [file_path for _, file_path in deleted])
+    
+    return None
+
+
+@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(
+    document_id: int,
+    background_tasks: BackgroundTasks,
+    organization: Organization = Depends(get_current_organization),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete document"""
+    
+    _require_delete_permission(current_user)
+    
+    # One round trip: the delete doubles as the existence check
+    result = await db.execute(
+        delete(Document)
         .where(
             Document.id == document_id,
             Document.organization_id == organization.id
         )
+        .returning(Document.file_path)
     )
-    document = result.scalar_one_or_none()
+    file_path = result.scalar_one_or_none()
     
-    if not document:
+    if file_path is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
-    
-    # Delete file
-    try:
-        if s3_service.enabled:
-            s3_service.delete_file(document.file_path)
-    except Exception:
-        pass
-    
-    # Delete from vector store (TODO: implement proper deletion)
-    # await vector_store.delete_document(organization.id, document_id)
-    
-    # Delete from database
-    await db.delete(document)
     await db.commit()
+    await document_versions.bump(organization.id)
+    
+    # Delete chunks and file after the response is sent
+    background_tasks.add_task(_remove_from_vector_store, organization.id, [document_id])
+    if s3_service.enabled:
+        background_tasks.add_task(s3_service.delete_file, file_path)
     
     return None
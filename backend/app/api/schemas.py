@@ -69,6 +69,13 @@ class DocumentResponse(BaseModel):
         from_attributes = True
 
 
+class DocumentStatusResponse(BaseModel):
+    id: int
+    processed: bool
+    processing_status: Optional[str]
+    processing_error: Optional[str] = None
+
+
 # Chat schemas
 class ChatQuery(BaseModel):
     query: str
@@ -1,4 +1,6 @@
 """Application configuration using Pydantic Settings"""
+import json
+from functools import cached_property, lru_cache
 from typing import Optional, List, Any
 from pydantic_settings import BaseSettings
 from pydantic import Field, validator
@@ -22,7 +24,6 @@ class Settings(BaseSettings):
         if isinstance(v, str) and not v.startswith("["):
             return [i.strip() for i in v.split(",")]
         elif isinstance(v, str) and v.startswith("["):
-            import json
             try:
                 return json.loads(v)
             except Exception:
@@ -44,6 +45,9 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str = "legalai_db"
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_STATEMENT_CACHE_SIZE: int = 1024  # Prepared statements cached per connection
     
     @property
     def DB_URL(self) -> str:
@@ -121,15 +125,41 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "INSECURE-DEFAULT-KEY-CHANGE-ME-IN-PRODUCTION-32CHARS"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
+    USER_CACHE_TTL_SECONDS: int = 60  # Cache of authenticated user lookups (Redis)
+    AUTH_LOCAL_CACHE_TTL_SECONDS: int = 30  # In-process user/organization cache in front of Redis
+    AUTH_LOCAL_CACHE_MAX_ENTRIES: int = 10000
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    JWT_CACHE_MAX_ENTRIES: int = 4096  # Verified token payloads kept per process
     
     # LLM Configuration - Google Gemini
     GEMINI_API_KEY: Optional[str] = None  # Made optional for deployment
     GEMINI_MODEL: str = "models/gemini-2.5-flash"
     GEMINI_EMBEDDING_MODEL: str = "models/gemini-embedding-001"
+    EMBED_BATCH_WINDOW_MS: int = 10  # Collect concurrent query embeddings for this long
+    EMBED_BATCH_MAX_SIZE: int = 32
+    GEMINI_HTTP_POOL_SIZE: int = 64  # Keep-alive connections shared by all Gemini calls
+    # Leading dimensions kept for query-to-query similarity (caches, intent prototypes).
+    # gemini-embedding-001 is Matryoshka-trained, so a truncated prefix stays comparable.
+    SIMILARITY_EMBEDDING_DIMENSIONS: Optional[int] = 768
     GEMINI_TEMPERATURE: float = 0.1
     GEMINI_MAX_TOKENS: int = 2000
     
+    # LLM response cache (semantic match on embeddings, exact match at temperature 0)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_MAX_ENTRIES: int = 1000
+    LLM_MAX_INFLIGHT: int = 64  # Concurrent Gemini requests per process
+    CHAT_CACHE_ENABLED: bool = True
+    CHAT_CACHE_SIMILARITY_THRESHOLD: float = 0.92
+    CHAT_CACHE_TTL_SECONDS: int = 600
+    CHAT_CACHE_MAX_ENTRIES: int = 1000
+    SAFETY_CACHE_TTL_SECONDS: int = 3600  # Safety verdicts shared across workers (Redis)
+    
+    # Intent classification (local prototype match, LLM fallback when ambiguous)
+    INTENT_CLASSIFIER_ENABLED: bool = True
+    INTENT_MIN_MARGIN: float = 0.1
+    
     # Alternative LLM (optional)
     CUSTOM_LLM_ENDPOINT: Optional[str] = None
     CUSTOM_LLM_API_KEY: Optional[str] = None
@@ -137,14 +167,39 @@ class Settings(BaseSettings):
     # RAG Configuration
     CHUNK_SIZE: int = 600
     CHUNK_OVERLAP: int = 100
+    INGEST_BATCH_SIZE: int = 128  # Chunks embedded and inserted per batch
+    INGEST_MAX_CONCURRENT_BATCHES: int = 4
+    MAX_CONCURRENT_EMBED_PER_ORG: int = 2  # Documents processed at once per organization
+    DOCUMENT_STATUS_TTL_SECONDS: int = 3600  # Live processing stage kept in Redis
+    DOCUMENT_PROCESSING_LEASE_SECONDS: int = 1800  # Before another process may take over processing
     RETRIEVAL_TOP_K: int = 5
     MMR_DIVERSITY_SCORE: float = 0.3
+    # Verification: skip the LLM verifier when response sentences clearly match sources
+    VERIFICATION_EMBEDDING_PRECHECK: bool = True
+    VERIFICATION_SIMILARITY_THRESHOLD: float = 0.6
+    VERIFICATION_MAX_UNSUPPORTED: int = 2
+    VERIFICATION_MIN_SUPPORTED_RATIO: float = 0.8
+    CONTEXT_CHUNK_MAX_CHARS: int = 4000  # Per-chunk cap when building agent prompts
     VECTOR_STORE_PATH: str = "./data/vector_stores"
+    VECTOR_INDEX_ENCODING: str = "fp16"  # flat, fp16 or int8
+    VECTOR_INDEX_INT8_MIN_VECTORS: int = 1000  # Kept flat until int8 ranges can be learned from this many
     
     # Document Storage
     UPLOAD_DIR: str = "./data/uploads"
     MAX_UPLOAD_SIZE_MB: int = 10
     ALLOWED_EXTENSIONS: List[str] = [".pdf", ".docx", ".txt"]
+    MAX_BULK_DELETE: int = 1000  # Document IDs per bulk delete request
+    EXTRACT_PROCESS_WORKERS: int = 2  # Processes parsing uploaded files
+    
+    @cached_property
+    def ALLOWED_EXTENSIONS_SET(self) -> frozenset:
+        """Lowercased allowed extensions for constant-time membership checks"""
+        return frozenset(ext.lower() for ext in self.ALLOWED_EXTENSIONS)
+    
+    @cached_property
+    def MAX_UPLOAD_BYTES(self) -> int:
+        """Upload size limit in bytes"""
+        return self.MAX_UPLOAD_SIZE_MB << 20
     
     # AWS S3 Configuration
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -152,11 +207,14 @@ class Settings(BaseSettings):
     AWS_REGION: str = "us-east-1"
     AWS_BUCKET_NAME: Optional[str] = None
     USE_S3: bool = True  # Enable S3 by default for production persistence
+    S3_MAX_POOL_CONNECTIONS: int = 50
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_PER_HOUR: int = 1000
     RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOCAL_SYNC_EVERY: int = 10  # Requests a worker may admit between Redis checks (0 = always check)
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 50000
     
     # Usage & Billing
     TRACK_USAGE: bool = True
@@ -178,5 +236,11 @@ class Settings(BaseSettings):
         case_sensitive = True
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build settings once; environment parsing and validation run on first call"""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
@@ -1,17 +1,122 @@
 """FastAPI dependencies for dependency injection"""
-from typing import AsyncGenerator, Optional
+import enum
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
 from fastapi import Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.db.base import get_db
+from sqlalchemy import DateTime
+from app.db.base import get_db_ro
+from app.core.config import settings
+from app.core.redis import redis_client
 from app.core.security import oauth2_scheme, decode_token
-from app.models.user import User
+from app.models.user import User, UserRole
 from app.models.organization import Organization
 
+# Never cache credentials
+_UNCACHED_USER_COLUMNS = {"hashed_password"}
+
+# Per-process tier in front of Redis: column values and their expiry.
+# Other workers may serve a changed record until AUTH_LOCAL_CACHE_TTL_SECONDS.
+_local_users: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_local_organizations: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+
+
+def _local_get(cache: Dict[int, Tuple[float, Dict[str, Any]]], key: int) -> Optional[Dict[str, Any]]:
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        cache.pop(key, None)
+        return None
+    return entry[1]
+
+
+def _local_set(cache: Dict[int, Tuple[float, Dict[str, Any]]], key: int, values: Dict[str, Any]) -> None:
+    if len(cache) >= settings.AUTH_LOCAL_CACHE_MAX_ENTRIES and key not in cache:
+        # Dicts keep insertion order, so this drops the oldest entry
+        cache.pop(next(iter(cache)))
+    cache[key] = (time.monotonic() + settings.AUTH_LOCAL_CACHE_TTL_SECONDS, values)
+
+
+def _column_values(instance: Any, exclude: frozenset = frozenset()) -> Dict[str, Any]:
+    return {
+        column.key: getattr(instance, column.key)
+        for column in type(instance).__table__.columns
+        if column.key not in exclude
+    }
+
+
+def _user_cache_key(user_id: int) -> str:
+    return f"user_cache:{user_id}"
+
+
+def _serialize_user(user: User) -> str:
+    data = {}
+    for column in User.__table__.columns:
+        if column.key in _UNCACHED_USER_COLUMNS:
+            continue
+        value = getattr(user, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, enum.Enum):
+            value = value.value
+        data[column.key] = value
+    return json.dumps(data)
+
+
+def _deserialize_user(raw: str) -> User:
+    data = json.loads(raw)
+    for column in User.__table__.columns:
+        value = data.get(column.key)
+        if value is not None and isinstance(column.type, DateTime):
+            data[column.key] = datetime.fromisoformat(value)
+    data["role"] = UserRole(data["role"])
+    return User(**data)
+
+
+async def _get_cached_user(user_id: int) -> Optional[User]:
+    """Return the cached user for this ID, if any"""
+    if not redis_client.redis:
+        return None
+    try:
+        raw = await redis_client.redis.get(_user_cache_key(user_id))
+        return _deserialize_user(raw) if raw else None
+    except Exception:
+        return None
+
+
+async def _cache_user(user: User, token_expires_at: Optional[float]) -> None:
+    """Cache a user for USER_CACHE_TTL_SECONDS, never beyond the token's expiry"""
+    if not redis_client.redis:
+        return
+    ttl = settings.USER_CACHE_TTL_SECONDS
+    if token_expires_at is not None:
+        ttl = min(ttl, int(token_expires_at - time.time()))
+    if ttl <= 0:
+        return
+    try:
+        await redis_client.redis.setex(_user_cache_key(user.id), ttl, _serialize_user(user))
+    except Exception:
+        pass
+
+
+async def invalidate_cached_user(user_id: int) -> None:
+    """Drop a user's cached record after it changes"""
+    _local_users.pop(user_id, None)
+    if not redis_client.redis:
+        return
+    try:
+        await redis_client.redis.delete(_user_cache_key(user_id))
+    except Exception:
+        pass
+
 
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ) -> User:
     """Get current authenticated user from JWT token"""
     credentials_exception = HTTPException(
@@ -21,19 +126,29 @@ async def get_current_user(
     )
     
     try:
-        payload = decode_token(token)
+        # Already verified by TenantIsolationMiddleware for the same header
+        payload = getattr(request.state, "jwt_payload", None) or decode_token(token)
         user_id = int(payload.get("sub"))
         if user_id is None:
             raise credentials_exception
     except Exception:
         raise credentials_exception
     
-    # Fetch user from database
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    
-    if user is None:
-        raise credentials_exception
+    # Fetch user from this process, then Redis, then database. Each request
+    # gets its own detached instance built from the cached column values.
+    values = _local_get(_local_users, user_id)
+    if values is not None:
+        user = User(**values)
+    else:
+        user = await _get_cached_user(user_id)
+        if user is None:
+            user = await db.get(User, user_id)
+            
+            if user is None:
+                raise credentials_exception
+            
+            await _cache_user(user, payload.get("exp"))
+        _local_set(_local_users, user_id, _column_values(user, _UNCACHED_USER_COLUMNS))
     
     if not user.is_active:
         raise HTTPException(
@@ -55,13 +170,14 @@ async def get_current_active_user(
 
 async def get_current_organization(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ) -> Organization:
     """Get current user's organization"""
-    result = await db.execute(
-        select(Organization).where(Organization.id == current_user.organization_id)
-    )
-    organization = result.scalar_one_or_none()
+    values = _local_get(_local_organizations, current_user.organization_id)
+    if values is not None:
+        return Organization(**values)
+    
+    organization = await db.get(Organization, current_user.organization_id)
     
     if organization is None:
         raise HTTPException(
@@ -69,6 +185,7 @@ async def get_current_organization(
             detail="Organization not found"
         )
     
+    _local_set(_local_organizations, organization.id, _column_values(organization))
     return organization
 
 
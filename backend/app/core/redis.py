@@ -0,0 +1,41 @@
+"""Shared Redis connection (optional - features degrade gracefully without it)"""
+from typing import Optional
+import redis.asyncio as aioredis
+from app.core.config import settings
+
+
+class RedisClient:
+    """Holds the application's Redis connection, or None when unavailable"""
+    
+    def __init__(self):
+        self.redis: Optional[aioredis.Redis] = None
+    
+    async def init(self):
+        """Initialize Redis connection"""
+        redis_url = settings.REDIS_CONNECTION_URL
+        if not redis_url:
+            # Redis not configured, dependent features will be disabled
+            self.redis = None
+            return
+            
+        try:
+            # Replies stay bytes: JSON consumers parse bytes directly, the rate
+            # limiter only reads integers, and the few plain strings decode on read
+            self.redis = await aioredis.from_url(
+                redis_url,
+                socket_keepalive=True,
+                health_check_interval=30
+            )
+        except Exception as e:
+            # If Redis connection fails, disable dependent features gracefully
+            print(f"Warning: Redis connection failed: {e}. Rate limiting and caching disabled.")
+            self.redis = None
+    
+    async def close(self):
+        """Close Redis connection"""
+        if self.redis:
+            await self.redis.close()
+
+
+# Global Redis client instance
+redis_client = RedisClient()
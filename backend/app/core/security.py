@@ -1,6 +1,7 @@
 """Security utilities for JWT and password hashing"""
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
@@ -48,17 +49,40 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     return encoded_jwt
 
 
+# Payloads of tokens that already passed verification, with their expiry
+_verified_tokens: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
 def decode_token(token: str) -> Dict[str, Any]:
-    """Decode and verify JWT token"""
+    """
+    Decode and verify JWT token
+    
+    A token's signature and claims can't change, so once verified its
+    payload is reused until the token expires.
+    """
+    cached = _verified_tokens.get(token)
+    if cached is not None:
+        if cached[0] > time.time():
+            return cached[1]
+        # Expired: let jwt.decode reject it below
+        _verified_tokens.pop(token, None)
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         ) from e
+    
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        if len(_verified_tokens) >= settings.JWT_CACHE_MAX_ENTRIES:
+            # Dicts keep insertion order, so this drops the oldest entry
+            _verified_tokens.pop(next(iter(_verified_tokens)))
+        _verified_tokens[token] = (exp, payload)
+    return payload
 
 
 def verify_token_type(payload: Dict[str, Any], expected_type: str) -> None:
@@ -1,9 +1,12 @@
 """Database configuration and session management"""
+import logging
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 # Create async engine
 engine = create_async_engine(
@@ -11,8 +14,15 @@ engine = create_async_engine(
     echo=settings.DEBUG,
     future=True,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=1800,
+    connect_args={
+        # Prepared statements per connection, reused across requests
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        # Short OLTP queries lose more to JIT compilation than they gain
+        "server_settings": {"jit": "off"},
+    },
 )
 
 # Create async session factory
@@ -24,6 +34,15 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Sessions for requests that only read: autocommit skips the BEGIN and
+# COMMIT round trips around every request
+AsyncReadSessionLocal = async_sessionmaker(
+    engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
 # Declarative base for models
 Base = declarative_base()
 
@@ -33,7 +52,9 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            # Nothing to commit if the request never touched the database
+            if session.in_transaction():
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -41,10 +62,32 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_db_ro() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for sessions that only read; nothing is ever committed"""
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
 from sqlalchemy import text
 
 # ... (imports)
 
+async def _migrate(conn: AsyncConnection, *statements: str) -> None:
+    """
+    Apply one migration inside a savepoint
+    
+    A failed statement aborts the enclosing Postgres transaction, so without
+    the savepoint every later migration (and create_all) would be rolled
+    back along with it.
+    """
+    try:
+        async with conn.begin_nested():
+            for statement in statements:
+                await conn.execute(text(statement))
+    except Exception as e:
+        logger.warning(f"Migration warning: {e}")
+
+
 async def init_db() -> None:
     """Initialize database - create tables and apply partial migrations"""
     async with engine.begin() as conn:
@@ -52,12 +95,59 @@ async def init_db() -> None:
         
         # Auto-migration: Ensure processing_status column exists
         # This fixes the "UndefinedColumnError" on existing databases (Production/Local)
-        try:
-            await conn.execute(text(
-                "ALTER TABLE documents ADD COLUMN IF NOT EXISTS processing_status VARCHAR(50) DEFAULT 'queued'"
-            ))
-        except Exception as e:
-            print(f"Migration warning: {e}")
+        await _migrate(
+            conn,
+            "ALTER TABLE documents ADD COLUMN IF NOT EXISTS processing_status VARCHAR(50) DEFAULT 'queued'"
+        )
+        
+        # Auto-migration: Composite index for the paginated document listing
+        await _migrate(
+            conn,
+            "CREATE INDEX IF NOT EXISTS ix_documents_org_uploaded "
+            "ON documents (organization_id, uploaded_at DESC, id DESC)"
+        )
+        
+        # Auto-migration: Content hash for duplicate upload detection
+        await _migrate(
+            conn,
+            "ALTER TABLE documents ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64)",
+            "CREATE INDEX IF NOT EXISTS ix_documents_org_sha256 ON documents (organization_id, sha256)"
+        )
+        
+        # Auto-migration: Organization lookups use the composite indexes'
+        # leading column; keep only a small partial index for unfinished work
+        await _migrate(
+            conn,
+            "DROP INDEX IF EXISTS ix_documents_organization_id",
+            "CREATE INDEX IF NOT EXISTS ix_documents_unprocessed ON documents (id) "
+            "WHERE NOT processed AND processing_error IS NULL"
+        )
+        
+        # Auto-migration: Timestamps defaulted by the database (naive UTC)
+        await _migrate(conn, *(
+            f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT timezone('utc', now())"
+            for table, column in (
+                ("documents", "uploaded_at"),
+                ("organizations", "created_at"),
+                ("organizations", "updated_at"),
+            )
+        ))
+        
+        # Auto-migration: Processing lease so only one process resumes a document
+        await _migrate(
+            conn,
+            "ALTER TABLE documents ADD COLUMN IF NOT EXISTS processing_lease_until TIMESTAMP"
+        )
+        
+        # Auto-migration: 64-bit file sizes; only rewrites the table once
+        await _migrate(
+            conn,
+            "DO $$ BEGIN "
+            "IF (SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'documents' AND column_name = 'file_size_bytes') = 'integer' THEN "
+            "ALTER TABLE documents ALTER COLUMN file_size_bytes TYPE BIGINT; "
+            "END IF; END $$"
+        )
 
 
 async def close_db() -> None:
@@ -1,11 +1,16 @@
 """FastAPI main application"""
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
 from app.db.base import init_db, close_db
 from app.middleware.tenant_isolation import TenantIsolationMiddleware
-from app.middleware.rate_limiter import RateLimitMiddleware, rate_limiter
+from app.core.redis import redis_client
+from app.services.genai_client import close_client as close_genai_client
+from app.rag.document_processor import document_processor
+from app.middleware.rate_limiter import RateLimitMiddleware
 from app.api import auth, documents, chat
 
 
@@ -22,13 +27,15 @@ async def lifespan(app: FastAPI):
     logger = logging.getLogger(__name__)
     logger.info("Starting up Legal AI Backend...")
     
-    # Startup
-    await init_db()
-    await rate_limiter.init()
+    # Startup; the database and Redis connect independently
+    await asyncio.gather(init_db(), redis_client.init())
+    await documents.resume_interrupted_documents()
     yield   
     # Shutdown
     await close_db()
-    await rate_limiter.close()
+    await redis_client.close()
+    close_genai_client()
+    document_processor.shutdown()
 
 
 # Create FastAPI app
@@ -36,24 +43,27 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Legal Chatbot",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
-# CORS middleware
+# Custom middleware; the last added runs first, and the rate limiter reads
+# the user that tenant isolation puts on request.state
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(TenantIsolationMiddleware)
+
+# CORS middleware, added last so it is outermost: responses the custom
+# middleware returns early (401, 429) still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.BACKEND_CORS_ORIGINS,
+    allow_origins=frozenset(settings.BACKEND_CORS_ORIGINS),  # Checked per request
     allow_origin_regex=r"https://legalaichatbot.*\.vercel\.app",  # Allow all Vercel preview URLs
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Document listing pagination
 )
 
-# Custom middleware
-app.add_middleware(TenantIsolationMiddleware)
-app.add_middleware(RateLimitMiddleware)
-
 # Include routers
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(documents.router, prefix=settings.API_V1_PREFIX)
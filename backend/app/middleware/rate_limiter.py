@@ -1,41 +1,78 @@
 """Rate limiting middleware using Redis"""
 import time
-from typing import Optional
-from fastapi import Request, HTTPException, status
+from typing import Dict, List, Optional, Tuple
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 import redis.asyncio as aioredis
 from app.core.config import settings
+from app.core.redis import redis_client
+
+
+# Token buckets, one per key, checked and updated atomically. Requests a
+# worker already admitted locally are charged first; the current request is
+# then allowed only if every bucket has a token, and takes one from each.
+# ARGV: now_ms, locally admitted count, then capacity and refill rate
+# (tokens/ms) for each key.
+# Returns 1/0 per bucket for whether it was empty, then each bucket's
+# remaining tokens.
+_TOKEN_BUCKET_LUA = """
+local now = tonumber(ARGV[1])
+local served = tonumber(ARGV[2])
+local levels = {}
+local allowed = true
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 + 1])
+    local rate = tonumber(ARGV[i * 2 + 2])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - served
+    levels[i] = tokens
+    if tokens < 1 then
+        allowed = false
+    end
+end
+local result = {}
+local count = #KEYS
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 + 1])
+    local rate = tonumber(ARGV[i * 2 + 2])
+    local tokens = levels[i]
+    result[i] = tokens < 1 and 1 or 0
+    if allowed then
+        tokens = tokens - 1
+    end
+    result[count + i] = math.floor(tokens)
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    -- Keep the bucket only until it would be full again
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate) + 1000)
+end
+return result
+"""
+
+
+class _LocalBucket:
+    """This worker's view of a set of Redis buckets between syncs"""
+    
+    __slots__ = ("tokens", "updated_at", "served")
+    
+    def __init__(self, tokens: List[float], served: int = 0):
+        self.tokens = tokens
+        self.updated_at = time.monotonic()
+        self.served = served  # Admitted locally, not yet charged in Redis
 
 
 class RateLimiter:
-    """Redis-based rate limiter"""
+    """Redis-based rate limiter with a per-worker first tier"""
     
     def __init__(self):
-        self.redis: Optional[aioredis.Redis] = None
+        self._script = None
+        self._local: Dict[Tuple[str, ...], _LocalBucket] = {}
     
-    async def init(self):
-        """Initialize Redis connection"""
-        redis_url = settings.REDIS_CONNECTION_URL
-        if not redis_url:
-            # Redis not configured, rate limiting will be disabled
-            self.redis = None
-            return
-            
-        try:
-            self.redis = await aioredis.from_url(
-                redis_url,
-                encoding="utf-8",
-                decode_responses=True
-            )
-        except Exception as e:
-            # If Redis connection fails, disable rate limiting gracefully
-            print(f"Warning: Redis connection failed: {e}. Rate limiting disabled.")
-            self.redis = None
-    
-    async def close(self):
-        """Close Redis connection"""
-        if self.redis:
-            await self.redis.close()
+    @property
+    def redis(self) -> Optional[aioredis.Redis]:
+        return redis_client.redis
     
     async def is_rate_limited(
         self,
@@ -44,24 +81,85 @@ class RateLimiter:
         window_seconds: int
     ) -> bool:
         """Check if rate limit is exceeded"""
-        if not self.redis or not settings.RATE_LIMIT_ENABLED:
+        return (await self.check_many([(key, limit, window_seconds)]))[0]
+    
+    def _admit_locally(self, keys: Tuple[str, ...], checks: List[Tuple[str, int, int]]) -> bool:
+        """
+        Admit a request without Redis when the last synced levels leave room
+        
+        The local copy refills at the same rate as Redis. A worker admits at
+        most RATE_LIMIT_LOCAL_SYNC_EVERY requests between syncs, and only
+        while every bucket holds more than that, so the shared limit can be
+        overshot by at most that many requests per worker.
+        """
+        bucket = self._local.get(keys)
+        sync_every = settings.RATE_LIMIT_LOCAL_SYNC_EVERY
+        if bucket is None or bucket.served >= sync_every:
+            return False
+        
+        now = time.monotonic()
+        elapsed = now - bucket.updated_at
+        tokens = [
+            min(limit, level + elapsed * limit / window_seconds)
+            for level, (_, limit, window_seconds) in zip(bucket.tokens, checks)
+        ]
+        if any(level <= sync_every for level in tokens):
             return False
         
-        current_time = int(time.time())
-        window_key = f"rate_limit:{key}:{current_time // window_seconds}"
+        bucket.tokens = [level - 1 for level in tokens]
+        bucket.updated_at = now
+        bucket.served += 1
+        return True
+    
+    def _store_local(self, keys: Tuple[str, ...], remaining: List[float], served: int) -> None:
+        if keys not in self._local and len(self._local) >= settings.RATE_LIMIT_LOCAL_MAX_KEYS:
+            # Dicts keep insertion order, so this drops the oldest entry
+            self._local.pop(next(iter(self._local)))
+        self._local[keys] = _LocalBucket([level - served for level in remaining], served)
+    
+    async def check_many(self, checks: List[Tuple[str, int, int]]) -> List[bool]:
+        """
+        Count a request against several limits, in at most one Redis round trip
+        
+        Each limit is a token bucket holding `limit` tokens that refills
+        over `window_seconds`, so bursts can't double up at window edges.
+        While the last synced levels are far from empty, requests are
+        admitted in process and charged to Redis on the next sync.
+        
+        Args:
+            checks: (key, limit, window_seconds) for each limit
+        
+        Returns:
+            Whether each limit is exceeded, in the same order
+        """
+        if not self.redis or not settings.RATE_LIMIT_ENABLED:
+            return [False] * len(checks)
+        
+        keys = tuple(f"rate_limit:{key}:{window_seconds}" for key, _, window_seconds in checks)
+        if self._admit_locally(keys, checks):
+            return [False] * len(checks)
+        
+        # Sent as EVALSHA; redis-py loads the script again if Redis lost it
+        if self._script is None or self._script.registered_client is not self.redis:
+            self._script = self.redis.register_script(_TOKEN_BUCKET_LUA)
+        
+        bucket = self._local.get(keys)
+        served = bucket.served if bucket else 0
+        args = [int(time.time() * 1000), served]
+        for _, limit, window_seconds in checks:
+            args.extend((limit, limit / (window_seconds * 1000)))
         
         try:
-            # Increment counter
-            count = await self.redis.incr(window_key)
-            
-            # Set expiry on first increment
-            if count == 1:
-                await self.redis.expire(window_key, window_seconds)
-            
-            return count > limit
+            result = await self._script(keys=list(keys), args=args)
         except Exception:
             # If Redis fails, allow the request
-            return False
+            return [False] * len(checks)
+        
+        # Requests admitted locally while the script ran are charged next sync
+        unsynced = bucket.served - served if bucket is not None and self._local.get(keys) is bucket else 0
+        count = len(checks)
+        self._store_local(keys, [float(level) for level in result[count:]], unsynced)
+        return [bool(flag) for flag in result[:count]]
 
 
 # Global rate limiter instance
@@ -72,36 +170,35 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     """Middleware for rate limiting"""
     
     async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for health checks
-        if request.url.path == "/health":
+        # Skip rate limiting for health checks, and all of it when there is
+        # nothing to check against
+        if (
+            not settings.RATE_LIMIT_ENABLED
+            or rate_limiter.redis is None
+            or request.url.path == "/health"
+        ):
             return await call_next(request)
         
         # Get user/org from request state (set by tenant isolation middleware)
-        user_id = getattr(request.state, "user_id", None)
-        org_id = getattr(request.state, "organization_id", None)
+        tenant = getattr(request.state, "tenant", None)
         
-        if user_id and org_id:
-            # Check per-minute rate limit
-            user_key = f"user:{user_id}"
-            if await rate_limiter.is_rate_limited(
-                user_key,
-                settings.RATE_LIMIT_PER_MINUTE,
-                60
-            ):
-                raise HTTPException(
+        if tenant and tenant.user_id and tenant.organization_id:
+            # Check per-minute and per-hour rate limits together
+            user_key = f"user:{tenant.user_id}"
+            per_minute_exceeded, per_hour_exceeded = await rate_limiter.check_many([
+                (user_key, settings.RATE_LIMIT_PER_MINUTE, 60),
+                (user_key, settings.RATE_LIMIT_PER_HOUR, 3600)
+            ])
+            # Middleware sits outside FastAPI's exception handlers, so respond directly
+            if per_minute_exceeded:
+                return JSONResponse(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail="Rate limit exceeded. Please try again later."
+                    content={"detail": "Rate limit exceeded. Please try again later."}
                 )
-            
-            # Check per-hour rate limit
-            if await rate_limiter.is_rate_limited(
-                user_key,
-                settings.RATE_LIMIT_PER_HOUR,
-                3600
-            ):
-                raise HTTPException(
+            if per_hour_exceeded:
+                return JSONResponse(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail="Hourly rate limit exceeded. Please try again later."
+                    content={"detail": "Hourly rate limit exceeded. Please try again later."}
                 )
         
         response = await call_next(request)
@@ -1,24 +1,33 @@
 """Tenant isolation middleware for multi-tenancy"""
+from typing import NamedTuple, Optional
 from fastapi import Request, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.core.security import decode_token
 
 
+class TenantContext(NamedTuple):
+    """Caller identity taken from a verified token"""
+    user_id: Optional[int]
+    organization_id: Optional[int]
+
+
+# Prefixes served without tenant context; str.startswith checks a tuple in one call
+_PUBLIC_PATHS = (
+    "/api/v1/auth/login",
+    "/api/v1/auth/register",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/health"
+)
+
+
 class TenantIsolationMiddleware(BaseHTTPMiddleware):
     """Middleware to extract and inject tenant context from JWT"""
     
     async def dispatch(self, request: Request, call_next):
         # Skip tenant isolation for public endpoints
-        public_paths = [
-            "/api/v1/auth/login",
-            "/api/v1/auth/register",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-            "/health"
-        ]
-        
-        if any(request.url.path.startswith(path) for path in public_paths):
+        if request.url.path.startswith(_PUBLIC_PATHS):
             return await call_next(request)
         
         # Extract token from Authorization header
@@ -28,9 +37,14 @@ class TenantIsolationMiddleware(BaseHTTPMiddleware):
             token = auth_header.split(" ")[1]
             try:
                 payload = decode_token(token)
-                # Inject organization_id into request state
-                request.state.organization_id = payload.get("organization_id")
-                request.state.user_id = payload.get("sub")
+                # Reused by get_current_user so the signature is verified once
+                request.state.jwt_payload = payload
+                # Inject tenant context into request state
+                sub = payload.get("sub")
+                request.state.tenant = TenantContext(
+                    user_id=int(sub) if sub is not None else None,
+                    organization_id=payload.get("organization_id")
+                )
             except Exception:
                 # Token validation will be handled by dependencies
                 pass
@@ -1,6 +1,5 @@
 """Document model for legal document storage"""
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Enum as SQLEnum
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, ForeignKey, Boolean, Text, Index, Enum as SQLEnum, func, text
 from sqlalchemy.orm import relationship
 import enum
 from app.db.base import Base
@@ -31,14 +30,15 @@ class Document(Base):
     id = Column(Integer, primary_key=True, index=True)
     
     # Multi-tenancy
-    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
     uploaded_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     
     # File information
     filename = Column(String(500), nullable=False)
     file_path = Column(String(1000), nullable=False)
-    file_size_bytes = Column(Integer, nullable=False)
+    file_size_bytes = Column(BigInteger, nullable=False)
     file_type = Column(String(50), nullable=False)  # .pdf, .docx, .txt
+    sha256 = Column(String(64), nullable=True)  # Content hash for duplicate uploads
     
     # Legal metadata
     document_type = Column(SQLEnum(DocumentType), default=DocumentType.OTHER, nullable=False)
@@ -53,14 +53,28 @@ class Document(Base):
     processing_status = Column(String(50), default="queued", nullable=True)  # queued, extracting, chunking, embedding, indexing, completed, failed
     processing_error = Column(Text, nullable=True)
     chunk_count = Column(Integer, default=0)
+    processing_lease_until = Column(DateTime, nullable=True)  # Claimed by a process until then (UTC)
     
     # Timestamps
-    uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    uploaded_at = Column(DateTime, server_default=func.timezone("utc", func.now()), nullable=False)
     processed_at = Column(DateTime, nullable=True)
     
-    # Relationships
-    organization = relationship("Organization", back_populates="documents")
-    uploader = relationship("User", foreign_keys=[uploaded_by])
+    # Relationships; never loaded implicitly, so an accidental per-row lazy
+    # load fails loudly instead of issuing a SELECT (use selectinload instead)
+    organization = relationship("Organization", back_populates="documents", lazy="raise_on_sql")
+    uploader = relationship("User", foreign_keys=[uploaded_by], lazy="raise_on_sql")
+    
+    __table_args__ = (
+        # Serves the newest-first document listing with keyset pagination
+        Index("ix_documents_org_uploaded", organization_id, uploaded_at.desc(), id.desc()),
+        Index("ix_documents_org_sha256", organization_id, sha256),
+        # Only unfinished documents, for resuming processing on startup
+        Index(
+            "ix_documents_unprocessed",
+            id,
+            postgresql_where=text("NOT processed AND processing_error IS NULL")
+        ),
+    )
     
     def __repr__(self):
         return f"<Document(id={self.id}, filename='{self.filename}', org_id={self.organization_id}, processed={self.processed})>"
@@ -1,6 +1,5 @@
 """Organization model for multi-tenancy"""
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Enum as SQLEnum, func
 from sqlalchemy.orm import relationship
 import enum
 from app.db.base import Base
@@ -25,8 +24,9 @@ class Organization(Base):
         default=SubscriptionTier.FREE,
         nullable=False
     )
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Naive UTC, set by the database
+    created_at = Column(DateTime, server_default=func.timezone("utc", func.now()), nullable=False)
+    updated_at = Column(DateTime, server_default=func.timezone("utc", func.now()), onupdate=func.timezone("utc", func.now()))
     
     # Rate limiting per tier
     rate_limit_per_minute = Column(Integer, default=10)
@@ -1,8 +1,15 @@
 """Document chunker for legal documents"""
-from typing import List, Dict, Any
+from itertools import chain
+from typing import List, Dict, Any, Iterator, Tuple
 import re
 from app.core.config import settings
 
+# Compiled once per process. Section markers form one alternation so
+# detection is a single pass over the text.
+_SECTION_RE = re.compile(r'Section \d+|Article \d+|§\s*\d+|Clause \d+|\d+\.\s+[A-Z]')
+_SPLIT_RE = re.compile(r'(Section \d+|Article \d+|§\s*\d+|Clause \d+)')
+_WORD_RE = re.compile(r'\S+')
+
 
 class LegalDocumentChunker:
     """Chunker optimized for legal documents with hierarchy preservation"""
@@ -12,19 +19,15 @@ class LegalDocumentChunker:
         chunk_size: int = settings.CHUNK_SIZE,
         chunk_overlap: int = settings.CHUNK_OVERLAP
     ):
+        # Windows must advance, or consecutive chunks would repeat the same words
+        if chunk_overlap >= chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})"
+            )
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        # Pre-compile regex patterns for performance
-        self.section_patterns = [
-            re.compile(p) for p in [
-                r'Section \d+',
-                r'Article \d+',
-                r'§\s*\d+',
-                r'Clause \d+',
-                r'\d+\.\s+[A-Z]'
-            ]
-        ]
-        self.split_pattern = re.compile(r'(Section \d+|Article \d+|§\s*\d+|Clause \d+)')
+        self.section_pattern = _SECTION_RE
+        self.split_pattern = _SPLIT_RE
     
     def chunk_document(
         self,
@@ -41,164 +44,173 @@ class LegalDocumentChunker:
         Returns:
             List of chunks with metadata
         """
-        # Try to detect legal structure
-        chunks = []
+        return list(self.iter_chunks(text, metadata))
+    
+    def iter_chunks(
+        self,
+        text: str,
+        metadata: Dict[str, Any]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily chunk document with legal hierarchy preservation
         
+        Chunks are produced one at a time so callers can embed and release
+        them in batches instead of holding every chunk of a large document.
+        Each chunk's metadata also carries its text, as the vector store
+        expects.
+        
+        Args:
+            text: Document text
+            metadata: Document metadata (jurisdiction, court, etc.)
+        
+        Yields:
+            Chunks with metadata
+        """
         # Check if document has clear section markers
         if self._has_section_markers(text):
-            chunks = self._chunk_by_sections(text, metadata)
-        else:
-            chunks = self._chunk_by_tokens(text, metadata)
-        
-        return chunks
+            return self._chunk_by_sections(text, metadata)
+        return self._chunk_by_tokens(text, metadata)
     
     def _has_section_markers(self, text: str) -> bool:
         """Check if document has section markers"""
-        for pattern in self.section_patterns:
-            if pattern.search(text):
-                return True
-        return False
+        return self.section_pattern.search(text) is not None
     
     def _chunk_by_sections(
         self,
         text: str,
         metadata: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """Chunk by legal sections"""
-        chunks = []
-        
-        # Split by section markers
-        parts = self.split_pattern.split(text)
-        
         current_section = None
-        current_text = ""
-        
-        for part in parts:
-            if self.split_pattern.match(part):
-                # Save previous section
-                if current_text:
-                    chunks.extend(
-                        self._split_long_text(current_text, metadata, current_section)
-                    )
-                current_section = part
-                current_text = part + "\n"
-            else:
-                current_text += part
-        
-        # Save last section
-        if current_text:
-            chunks.extend(
-                self._split_long_text(current_text, metadata, current_section)
-            )
-        
-        return chunks
+        body_start = 0
+        
+        # Walk section markers; None marks the end of the text
+        for match in chain(self.split_pattern.finditer(text), [None]):
+            body_end = match.start() if match else len(text)
+            current_text = text[body_start:body_end]
+            if current_section is not None:
+                current_text = f"{current_section}\n{current_text}"
+            
+            # Save previous section
+            if current_text:
+                yield from self._split_long_text(current_text, metadata, current_section)
+            
+            if match:
+                current_section = match.group(0)
+                body_start = match.end()
     
     def _chunk_by_tokens(
         self,
         text: str,
         metadata: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """Chunk by token count with overlap using memory-efficient generator"""
-        chunks = []
-        
-        # Approximate tokens by splitting on whitespace
-        # Use a generator expression if possible, but for simplicity and safety against OOM
-        # with huge splits, we'll iterate.
-        # Actually, for 136k chars, split() is fine (buffer is ~1MB). 
-        # The issue might be the logic loop or the number of small string allocations.
-        
-        words = text.split()
-        total_words = len(words)
-        
-        if total_words == 0:
-            return []
-            
         # Target words per chunk (approx 0.75 words per token)
         # Defaults: chunk_size=1000 -> 750 words
         words_per_chunk = int(self.chunk_size * 0.75)
-        words_overlap = int(self.chunk_overlap * 0.75)
         
-        start = 0
-        chunk_index = 0
+        # A text of n characters holds at most (n + 1) // 2 words, so short
+        # texts are a single chunk without locating any words
+        if (len(text) + 1) // 2 <= words_per_chunk:
+            chunk_text = text.strip()
+            if chunk_text:
+                chunk_metadata = metadata.copy()
+                chunk_metadata["chunk_index"] = 0
+                chunk_metadata["chunk_type"] = "token_based"
+                chunk_metadata["text"] = chunk_text
+                yield {
+                    "text": chunk_text,
+                    "metadata": chunk_metadata
+                }
+            return
+        
+        # Approximate tokens by whitespace-separated words; chunks are slices
+        # of the original text between word offsets, not re-joined words
+        starts, ends = self._word_offsets(text)
+        total_words = len(starts)
         
-        while start < total_words:
+        if total_words == 0:
+            return
+        
+        for chunk_index, start in enumerate(self._window_starts(total_words)):
             end = min(start + words_per_chunk, total_words)
-            chunk_words = words[start:end]
-            chunk_text = " ".join(chunk_words)
+            chunk_text = text[starts[start]:ends[end - 1]]
             
             chunk_metadata = metadata.copy()
             chunk_metadata["chunk_index"] = chunk_index
             chunk_metadata["chunk_type"] = "token_based"
+            chunk_metadata["text"] = chunk_text
             
-            chunks.append({
+            yield {
                 "text": chunk_text,
                 "metadata": chunk_metadata
-            })
-            
-            chunk_index += 1
-            
-            # Stop if we reached the end
-            if end >= total_words:
-                break
-                
-            # Move forward by stride (size - overlap)
-            stride = words_per_chunk - words_overlap
-            # Ensure stride is at least 1 to avoid infinite loop
-            stride = max(1, stride)
-            
-            start += stride
+            }
+    
+    def _word_offsets(self, text: str) -> Tuple[List[int], List[int]]:
+        """Start and end offsets of each whitespace-separated word in text"""
+        starts = []
+        ends = []
+        for match in _WORD_RE.finditer(text):
+            starts.append(match.start())
+            ends.append(match.end())
+        return starts, ends
+    
+    def _window_starts(self, total_words: int) -> range:
+        """
+        Start offsets of overlapping word windows covering total_words
+        
+        Windows advance by chunk size minus overlap (in words), and the last
+        one is the first to reach the end of the text.
+        
+        Args:
+            total_words: Number of words being chunked
         
-        return chunks
+        Returns:
+            Range of window start offsets
+        """
+        words_per_chunk = int(self.chunk_size * 0.75)
+        words_overlap = int(self.chunk_overlap * 0.75)
+        # Rounding to words can still close a small gap, so keep at least 1
+        stride = max(1, words_per_chunk - words_overlap)
+        # Smallest multiple of stride whose window reaches the end
+        last_start = max(0, -(-(total_words - words_per_chunk) // stride)) * stride
+        return range(0, min(last_start + 1, total_words), stride)
     
     def _split_long_text(
         self,
         text: str,
         metadata: Dict[str, Any],
         section_name: str = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """Split long text into smaller chunks"""
-        words = text.split()
-        total_words = len(words)
+        starts, ends = self._word_offsets(text)
+        total_words = len(starts)
         words_per_chunk = int(self.chunk_size * 0.75)
         
         if total_words <= words_per_chunk:
             chunk_metadata = metadata.copy()
             chunk_metadata["section"] = section_name
-            return [{
+            chunk_metadata["text"] = text
+            yield {
                 "text": text,
                 "metadata": chunk_metadata
-            }]
+            }
+            return
         
         # Split into multiple chunks
-        chunks = []
-        words_overlap = int(self.chunk_overlap * 0.75)
-        stride = max(1, words_per_chunk - words_overlap)
-        
-        start = 0
-        sub_index = 0
-        
-        while start < total_words:
+        for sub_index, start in enumerate(self._window_starts(total_words)):
             end = min(start + words_per_chunk, total_words)
-            chunk_words = words[start:end]
-            chunk_text = " ".join(chunk_words)
+            chunk_text = text[starts[start]:ends[end - 1]]
             
             chunk_metadata = metadata.copy()
             chunk_metadata["section"] = section_name
             chunk_metadata["sub_chunk"] = sub_index
+            chunk_metadata["text"] = chunk_text
             
-            chunks.append({
+            yield {
                 "text": chunk_text,
                 "metadata": chunk_metadata
-            })
-            
-            sub_index += 1
-            
-            if end >= total_words:
-                break
-                
-            start += stride
-        
-        return chunks
+            }
 
 
 # Global chunker instance
@@ -1,11 +1,40 @@
 """Document processor for legal documents"""
+import asyncio
+import multiprocessing
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, Optional
 from pathlib import Path
-import pypdf as PyPDF2
-from docx import Document as DocxDocument
 from app.core.config import settings
 
+# Metadata heuristics, matched case-insensitively against the document opening
+_JURISDICTIONS = {j.lower(): j for j in ["US", "UK", "India", "Canada", "Australia"]}
+_JURISDICTION_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, _JURISDICTIONS)) + r")\b",
+    re.IGNORECASE
+)
+_YEAR_RE = re.compile(r'\b(19\d{2}|20\d{2})\b')
+_COURT_LEVEL_RES = {
+    court_level: re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+    for court_level, keywords in {
+        "supreme_court": ["supreme court", "scotus", "uksc"],
+        "high_court": ["high court", "court of appeal"],
+        "district_court": ["district court", "county court"]
+    }.items()
+}
+
+
+def _warm_extract_worker() -> None:
+    """Process pool initializer: load the parsers before the first file arrives"""
+    import pypdf  # noqa: F401
+    import docx  # noqa: F401
+
+
+def _extract_text(file_path: str) -> str:
+    """Process pool entry point"""
+    return document_processor.extract_text(file_path)
+
 
 class DocumentProcessor:
     """Processor for extracting text from legal documents"""
@@ -13,6 +42,36 @@ class DocumentProcessor:
     def __init__(self):
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    async def extract_text_async(self, file_path: str) -> str:
+        """
+        Extract text in a worker process
+        
+        PDF parsing is CPU-bound and holds the GIL for seconds on large
+        files, so it runs outside the event loop's process.
+        
+        Args:
+            file_path: Path to document file (local path or S3 key)
+        
+        Returns:
+            Extracted text
+        """
+        if self._pool is None:
+            # Spawned, not forked: the server process has live threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.EXTRACT_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_extract_worker
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, _extract_text, file_path)
+    
+    def shutdown(self) -> None:
+        """Stop the extraction worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
     
     def extract_text(self, file_path: str) -> str:
         """
@@ -69,37 +128,43 @@ class DocumentProcessor:
     
     def _extract_from_pdf(self, file_path: Path) -> str:
         """Extract text from PDF"""
-        text = ""
+        # Parsers are imported on first use; most workers only serve chat
+        import pypdf as PyPDF2
+        
+        # Pages are collected and joined once instead of growing one string
+        pages = []
         try:
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 for page in pdf_reader.pages:
                     page_text = page.extract_text()
                     if page_text:
-                        text += page_text + "\n\n"
+                        pages.append(page_text)
         except Exception as e:
             raise Exception(f"Error extracting PDF: {str(e)}")
         
-        return text.strip()
+        return "\n\n".join(pages).strip()
     
     def _extract_from_docx(self, file_path: Path) -> str:
         """Extract text from DOCX"""
+        from docx import Document as DocxDocument
+        
         try:
             doc = DocxDocument(file_path)
-            text = "\n\n".join([paragraph.text for paragraph in doc.paragraphs])
+            text = "\n\n".join(paragraph.text for paragraph in doc.paragraphs)
             return text.strip()
         except Exception as e:
             raise Exception(f"Error extracting DOCX: {str(e)}")
     
     def _extract_from_txt(self, file_path: Path) -> str:
         """Extract text from TXT"""
+        # Read once; a non-UTF-8 file is decoded again from the same bytes
+        data = file_path.read_bytes()
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read().strip()
+            return data.decode('utf-8').strip()
         except UnicodeDecodeError:
             # Try with different encoding
-            with open(file_path, 'r', encoding='latin-1') as file:
-                return file.read().strip()
+            return data.decode('latin-1').strip()
     
     def extract_metadata(self, text: str, filename: str) -> Dict[str, Any]:
         """
@@ -122,29 +187,22 @@ class DocumentProcessor:
             "court_level": None
         }
         
+        # Only the opening of the document is inspected
+        prefix = text[:2000]
+        
         # Simple jurisdiction detection
-        jurisdictions = ["US", "UK", "India", "Canada", "Australia"]
-        for jurisdiction in jurisdictions:
-            if jurisdiction.lower() in text.lower()[:1000]:
-                metadata["jurisdiction"] = jurisdiction
-                break
+        match = _JURISDICTION_RE.search(prefix, 0, 1000)
+        if match:
+            metadata["jurisdiction"] = _JURISDICTIONS[match.group(0).lower()]
         
         # Simple year detection (look for 4-digit years)
-        import re
-        years = re.findall(r'\b(19\d{2}|20\d{2})\b', text[:2000])
-        if years:
-            metadata["year"] = int(years[0])
+        match = _YEAR_RE.search(prefix)
+        if match:
+            metadata["year"] = int(match.group(0))
         
         # Simple court level detection
-        court_keywords = {
-            "supreme_court": ["supreme court", "scotus", "uksc"],
-            "high_court": ["high court", "court of appeal"],
-            "district_court": ["district court", "county court"]
-        }
-        
-        text_lower = text.lower()[:2000]
-        for court_level, keywords in court_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
+        for court_level, pattern in _COURT_LEVEL_RES.items():
+            if pattern.search(prefix):
                 metadata["court_level"] = court_level
                 break
         
@@ -1,4 +1,5 @@
 """Vector store using FAISS with tenant isolation"""
+import asyncio
 import os
 import pickle
 from typing import List, Dict, Any, Optional
@@ -17,8 +18,9 @@ class VectorStore:
         self.base_path = Path(base_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
         self.indexes: Dict[int, faiss.Index] = {}
-        self.indexes: Dict[int, faiss.Index] = {}
         self.metadatas: Dict[int, List[Dict[str, Any]]] = {}
+        # Serializes index creation, inserts and saves per organization
+        self._locks: Dict[int, asyncio.Lock] = {}
     
     async def sync_all_from_s3(self) -> int:
         """
@@ -72,12 +74,13 @@ class VectorStore:
         
         # Download if exists in S3
         synced = False
-        if s3_service.file_exists(index_key):
-            s3_service.download_file(index_key, str(index_path))
+        # boto3 is blocking; keep it off the event loop
+        if await asyncio.to_thread(s3_service.file_exists, index_key):
+            await asyncio.to_thread(s3_service.download_file, index_key, str(index_path))
             synced = True
             
-        if s3_service.file_exists(metadata_key):
-            s3_service.download_file(metadata_key, str(metadata_path))
+        if await asyncio.to_thread(s3_service.file_exists, metadata_key):
+            await asyncio.to_thread(s3_service.download_file, metadata_key, str(metadata_path))
             
         return synced
 
@@ -96,14 +99,51 @@ class VectorStore:
         index_key = f"vector_stores/org_{organization_id}_index.faiss"
         metadata_key = f"vector_stores/org_{organization_id}_metadata.pkl"
         
-        # Upload
-        s3_service.upload_file_path(str(index_path), index_key)
+        # Upload (boto3 is blocking; keep it off the event loop)
+        await asyncio.to_thread(s3_service.upload_file_path, str(index_path), index_key)
         
         if metadata_path.exists():
-            s3_service.upload_file_path(str(metadata_path), metadata_key)
+            await asyncio.to_thread(s3_service.upload_file_path, str(metadata_path), metadata_key)
             
         return True
     
+    def _create_index(self, dimension: int) -> faiss.Index:
+        """
+        Create an empty L2 index using the configured vector encoding
+        
+        "fp16" and "int8" scalar quantization cut memory and scan bandwidth
+        2x and 4x versus "flat" float32. Existing indexes keep the encoding
+        they were saved with. An "int8" index starts out flat, since its
+        quantizer has to learn value ranges first; see _quantize_if_ready.
+        """
+        if settings.VECTOR_INDEX_ENCODING == "fp16":
+            return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+        return faiss.IndexFlatL2(dimension)
+    
+    def _quantize_if_ready(self, organization_id: int) -> None:
+        """
+        Convert a flat index to int8 once it holds enough vectors to train on
+        
+        The 8-bit quantizer maps each dimension's trained min/max range onto
+        256 levels. Ranges learned from a handful of vectors (often a single
+        chunk) are degenerate and encode every later vector identically, so
+        the index stays exact until VECTOR_INDEX_INT8_MIN_VECTORS are stored
+        and is then trained on all of them.
+        """
+        index = self.indexes[organization_id]
+        if (
+            settings.VECTOR_INDEX_ENCODING != "int8"
+            or not isinstance(index, faiss.IndexFlat)
+            or index.ntotal < settings.VECTOR_INDEX_INT8_MIN_VECTORS
+        ):
+            return
+        
+        vectors = index.reconstruct_n(0, index.ntotal)
+        quantized = faiss.IndexScalarQuantizer(index.d, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+        quantized.train(vectors)
+        quantized.add(vectors)
+        self.indexes[organization_id] = quantized
+    
     def _get_index_path(self, organization_id: int) -> Path:
         """Get path for organization's FAISS index"""
         return self.base_path / f"org_{organization_id}_index.faiss"
@@ -168,17 +208,26 @@ class VectorStore:
             print(f"Error saving index for org {organization_id}: {e}")
             return False
     
+    def _get_lock(self, organization_id: int) -> asyncio.Lock:
+        return self._locks.setdefault(organization_id, asyncio.Lock())
+    
     async def add_documents(
         self,
         organization_id: int,
-        chunks: List[Dict[str, Any]]
+        chunks: List[Dict[str, Any]],
+        persist: bool = True
     ) -> bool:
         """
         Add document chunks to organization's vector store
         
+        Safe to call concurrently for one organization: embedding runs in
+        parallel, inserts are serialized.
+        
         Args:
             organization_id: Organization ID for tenant isolation
             chunks: List of chunks with 'text' and 'metadata'
+            persist: Save to disk and S3 afterwards; batch callers pass False
+                and call persist() once at the end
         
         Returns:
             Success status
@@ -195,44 +244,61 @@ class VectorStore:
             embeddings_array = np.array(embeddings, dtype=np.float32)
             dimension = embeddings_array.shape[1]
             
-            # Load or create index
-            if organization_id not in self.indexes:
-                # Try to sync from S3 first
-                await self.sync_from_s3(organization_id)
+            async with self._get_lock(organization_id):
+                # Load or create index
+                if organization_id not in self.indexes:
+                    # Try to sync from S3 first
+                    await self.sync_from_s3(organization_id)
+                    
+                    if not self.load_index(organization_id):
+                        # Create new index
+                        self.indexes[organization_id] = self._create_index(dimension)
+                        self.metadatas[organization_id] = []
                 
-                if not self.load_index(organization_id):
-                    # Create new index
-                    self.indexes[organization_id] = faiss.IndexFlatL2(dimension)
-                    self.metadatas[organization_id] = []
-            
-            # Add to index
-            self.indexes[organization_id].add(embeddings_array)
+                # Add to index
+                self.indexes[organization_id].add(embeddings_array)
+                self._quantize_if_ready(organization_id)
+                
+                # Add metadata
+                self.metadatas[organization_id].extend([chunk["metadata"] for chunk in chunks])
             
-            # Add metadata
-            self.metadatas[organization_id].extend([chunk["metadata"] for chunk in chunks])
+            if persist:
+                return await self.persist(organization_id)
+            return True
             
+        except Exception as e:
+            print(f"Error adding documents for org {organization_id}: {e}")
+            return False
+    
+    async def persist(self, organization_id: int) -> bool:
+        """
+        Save organization's index to disk and S3
+        
+        Args:
+            organization_id: Organization ID for tenant isolation
+        
+        Returns:
+            Success status
+        """
+        async with self._get_lock(organization_id):
             # Save to disk (non-blocking)
-            import asyncio
-            from functools import partial
             loop = asyncio.get_running_loop()
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, partial(self.save_index, organization_id))
+            if not await loop.run_in_executor(None, self.save_index, organization_id):
+                return False
             
             # Sync to S3
             await self.sync_to_s3(organization_id)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error adding documents for org {organization_id}: {e}")
-            return False
+        
+        return True
     
     async def search(
         self,
         organization_id: int,
         query: str,
         top_k: int = settings.RETRIEVAL_TOP_K,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False,
+        text_max_chars: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Search organization's vector store
@@ -242,6 +308,8 @@ class VectorStore:
             query: Search query
             top_k: Number of results to return
             filters: Metadata filters (jurisdiction, court_level, year, etc.)
+            include_embeddings: Also return each chunk's stored embedding
+            text_max_chars: Truncate each result's metadata text to this length
         
         Returns:
             List of results with text, metadata, and score
@@ -281,11 +349,18 @@ class VectorStore:
                         if not self._matches_filters(metadata, filters):
                             continue
                     
-                    results.append({
+                    if text_max_chars is not None and len(metadata.get("text", "")) > text_max_chars:
+                        # Copy so the stored metadata keeps the full text
+                        metadata = {**metadata, "text": metadata["text"][:text_max_chars]}
+                    
+                    result = {
                         "metadata": metadata,
                         "score": float(dist),
                         "index": int(idx)
-                    })
+                    }
+                    if include_embeddings:
+                        result["embedding"] = index.reconstruct(int(idx))
+                    results.append(result)
                     
                     if len(results) >= top_k:
                         break
@@ -311,28 +386,41 @@ class VectorStore:
         document_id: int
     ) -> bool:
         """
-        Delete all chunks for a document
+        Delete all chunks for a document from the in-memory index
         
-        Note: FAISS doesn't support deletion, so we rebuild the index
-        """
-        if organization_id not in self.indexes:
-            if not self.load_index(organization_id):
-                return False
-        
-        # Filter out chunks from this document
-        metadatas = self.metadatas[organization_id]
-        keep_indices = [
-            i for i, meta in enumerate(metadatas)
-            if meta.get("document_id") != document_id
-        ]
+        Flat and scalar-quantized indexes compact in place, keeping the
+        remaining vectors in order, so metadata positions stay aligned.
+        Call persist() afterwards to save the change.
         
-        if len(keep_indices) == len(metadatas):
-            return False  # Document not found
+        Args:
+            organization_id: Organization ID for tenant isolation
+            document_id: Document whose chunks are removed
         
-        # Rebuild index (FAISS limitation)
-        # In production, consider using a different vector DB with native deletion
-        # For now, we'll mark this as a TODO
-        # TODO: Implement index rebuilding or use vector DB with deletion support
+        Returns:
+            Whether any chunks were removed
+        """
+        async with self._get_lock(organization_id):
+            if organization_id not in self.indexes:
+                # Try to sync from S3 first
+                await self.sync_from_s3(organization_id)
+                
+                if not self.load_index(organization_id):
+                    return False
+            
+            metadatas = self.metadatas[organization_id]
+            remove_ids = [
+                i for i, meta in enumerate(metadatas)
+                if meta.get("document_id") == document_id
+            ]
+            
+            if not remove_ids:
+                return False  # Document not found
+            
+            self.indexes[organization_id].remove_ids(np.array(remove_ids, dtype=np.int64))
+            self.metadatas[organization_id] = [
+                meta for meta in metadatas
+                if meta.get("document_id") != document_id
+            ]
         
         return True
 
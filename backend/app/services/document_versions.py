@@ -0,0 +1,51 @@
+"""Per-organization document set versions for invalidating cached answers"""
+import logging
+from typing import Dict
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentVersions:
+    """
+    Counter per organization, bumped whenever its searchable documents change
+    
+    Caches key their entries on the current version, so a bump makes every
+    answer computed over the old document set unreachable. The counter lives
+    in Redis so all workers see a bump; without Redis it is per process,
+    which is only exact for a single worker.
+    """
+    
+    def __init__(self):
+        self._local: Dict[int, int] = {}
+    
+    @staticmethod
+    def _key(organization_id: int) -> str:
+        return f"doc_version:{organization_id}"
+    
+    async def get(self, organization_id: int) -> int:
+        """
+        Current document version for an organization
+        
+        Raises:
+            redis.RedisError: If Redis is configured but unreachable; callers
+                should then bypass their cache rather than risk stale entries
+        """
+        if not redis_client.redis:
+            return self._local.get(organization_id, 0)
+        value = await redis_client.redis.get(self._key(organization_id))
+        return int(value) if value else 0
+    
+    async def bump(self, organization_id: int) -> None:
+        """Invalidate everything cached for an organization's documents"""
+        self._local[organization_id] = self._local.get(organization_id, 0) + 1
+        if not redis_client.redis:
+            return
+        try:
+            await redis_client.redis.incr(self._key(organization_id))
+        except Exception as e:
+            logger.warning(f"Failed to bump document version for org {organization_id}: {e}")
+
+
+# Global document versions instance
+document_versions = DocumentVersions()
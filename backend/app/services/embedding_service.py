@@ -1,18 +1,22 @@
 """Embedding service with Google Gemini API"""
-from typing import List
-from google import genai
+import asyncio
+from typing import Dict, List, Optional, Set
 from tenacity import retry, stop_after_attempt, wait_exponential
 from app.core.config import settings
+from app.services.genai_client import genai_client
 
 
 class EmbeddingService:
     """Service for generating embeddings using Gemini"""
     
     def __init__(self):
-        # Configure Gemini API with new SDK
-        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        self.client = genai_client
         self.model = settings.GEMINI_EMBEDDING_MODEL
         self.request_count = 0
+        # Query micro-batching: text -> futures awaiting its embedding
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
     
     @retry(
         stop=stop_after_attempt(3),
@@ -35,26 +39,87 @@ class EmbeddingService:
         self.request_count += 1
         return list(response.embeddings[0].values)
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
     async def embed_query(self, query: str) -> List[float]:
         """
         Generate embedding for a search query
         
+        Concurrent calls are collected for up to EMBED_BATCH_WINDOW_MS (or
+        until EMBED_BATCH_MAX_SIZE distinct queries are waiting) and embedded
+        in a single request. Identical queries in the same window share one
+        embedding.
+        
         Args:
             query: Query text to embed
         
         Returns:
             List of floats representing the embedding vector
         """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(query, []).append(future)
+        
+        if len(self._pending) >= settings.EMBED_BATCH_MAX_SIZE:
+            self._flush_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                settings.EMBED_BATCH_WINDOW_MS / 1000,
+                self._flush_pending
+            )
+        
+        return list(await future)
+    
+    def _flush_pending(self) -> None:
+        """Dispatch all waiting queries as one embedding request"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = asyncio.create_task(self._embed_pending(pending))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _embed_pending(self, pending: Dict[str, List[asyncio.Future]]) -> None:
+        """Embed a batch of queries and resolve their futures"""
+        texts = list(pending)
+        try:
+            embeddings = await self.embed_texts(texts)
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        
+        for text, embedding in zip(texts, embeddings):
+            for future in pending[text]:
+                if not future.done():
+                    future.set_result(embedding)
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10)
+    )
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a small list of texts in a single request
+        
+        Unlike embed_batch this does no rate-limit pacing, so keep it for
+        short lists on the request path (prototypes, sentences, queries).
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            List of embedding vectors in input order
+        """
         response = await self.client.aio.models.embed_content(
             model=self.model,
-            contents=query
+            contents=texts
         )
         self.request_count += 1
-        return list(response.embeddings[0].values)
+        return [list(emb.values) for emb in response.embeddings]
     
     async def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
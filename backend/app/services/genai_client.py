@@ -0,0 +1,64 @@
+"""Shared Gemini client with pooled HTTP connections"""
+import json
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from google import genai
+from google.genai import errors
+from google.genai._api_client import HttpRequest, HttpResponse
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One keep-alive pool for every Gemini call in the process
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_maxsize=settings.GEMINI_HTTP_POOL_SIZE))
+
+
+def _pooled_request(http_request: HttpRequest, stream: bool = False) -> HttpResponse:
+    """
+    Send an API-key request on the shared session
+
+    Mirrors the SDK's own request path, which opens a fresh requests.Session
+    (and so a new TCP + TLS handshake) for every call.
+    """
+    data = http_request.data
+    if data and not isinstance(data, bytes):
+        data = json.dumps(data)
+
+    response = _session.request(
+        method=http_request.method,
+        url=http_request.url,
+        headers=http_request.headers,
+        data=data or None,
+        timeout=http_request.timeout,
+        stream=stream,
+    )
+    errors.APIError.raise_for_response(response)
+    return HttpResponse(response.headers, response if stream else [response.text])
+
+
+def create_client() -> genai.Client:
+    """Create a Gemini client whose requests reuse pooled connections"""
+    client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    # Replaces a private method of google-genai==1.0.0 (pinned in
+    # requirements.txt) with a copy of its body. Re-check _pooled_request
+    # against the SDK's _request_unauthorized whenever that pin changes.
+    api_client = getattr(client, "_api_client", None)
+    if hasattr(api_client, "_request_unauthorized"):
+        api_client._request_unauthorized = _pooled_request
+    else:
+        logger.warning(
+            "google-genai client has no _request_unauthorized; "
+            "Gemini requests will not use the pooled HTTP session"
+        )
+    return client
+
+
+def close_client() -> None:
+    """Close pooled connections on shutdown"""
+    _session.close()
+
+
+# Global Gemini client instance
+genai_client = create_client()
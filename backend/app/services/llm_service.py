@@ -1,19 +1,100 @@
 """LLM service with Google Gemini API"""
-from typing import List, Dict, Any, Optional
-from google import genai
-from tenacity import retry, stop_after_attempt, wait_exponential
+import asyncio
+import hashlib
+import json
+import logging
+from typing import List, Dict, Any, Optional, Type, TypeVar
+from google.genai import errors as genai_errors
+from pydantic import BaseModel, ValidationError
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 from app.core.config import settings
+from app.services.embedding_service import embedding_service
+from app.services.genai_client import genai_client
+from app.services.semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+_JSON_DECODER = json.JSONDecoder()
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry rate limits, server errors and transport failures, not bad requests"""
+    if isinstance(exc, genai_errors.ClientError):
+        return exc.code == 429
+    return True
+
+
+def extract_json(content: str) -> Dict[str, Any]:
+    """
+    Parse the first JSON object in a model response
+    
+    Handles bare JSON as well as objects wrapped in markdown fences or prose.
+    If a brace in leading prose doesn't start valid JSON, decoding resumes
+    from the next one.
+    
+    Args:
+        content: Raw model output
+    
+    Returns:
+        Decoded JSON object
+    
+    Raises:
+        ValueError: If no JSON object can be decoded
+    """
+    start = content.find("{")
+    while start != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(content, start)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(obj, dict):
+                return obj
+        start = content.find("{", start + 1)
+    raise ValueError("No JSON object found in response")
+
+
+def parse_json_model(content: str, model: Type[ModelT]) -> ModelT:
+    """
+    Parse and validate a model response against a pydantic schema
+    
+    Bare JSON (the norm with a JSON response MIME type) is decoded and
+    validated in a single pass; anything else goes through extract_json.
+    
+    Args:
+        content: Raw model output
+        model: Pydantic model describing the expected object
+    
+    Returns:
+        Validated model instance
+    
+    Raises:
+        ValueError: If no JSON object matching the schema can be decoded
+    """
+    try:
+        return model.model_validate_json(content)
+    except ValidationError:
+        return model.model_validate(extract_json(content))
 
 
 class LLMService:
     """Service for LLM interactions with token counting and cost estimation"""
     
     def __init__(self):
-        # Configure Gemini API with new SDK
-        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        self.client = genai_client
         self.model_name = settings.GEMINI_MODEL
         self.temperature = settings.GEMINI_TEMPERATURE
         self.max_tokens = settings.GEMINI_MAX_TOKENS
+        self.cache = SemanticCache(
+            threshold=settings.LLM_CACHE_SIMILARITY_THRESHOLD,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            dimensions=settings.SIMILARITY_EMBEDDING_DIMENSIONS
+        )
+        # Bound concurrent Gemini calls so bursts queue instead of failing
+        self._semaphore = asyncio.Semaphore(settings.LLM_MAX_INFLIGHT)
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in text using Gemini's token counter"""
@@ -39,15 +120,15 @@ class LLMService:
         output_cost = (output_tokens / 1_000_000) * 0.30
         return input_cost + output_cost
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        cache_text: Optional[str] = None,
+        response_mime_type: Optional[str] = None,
+        organization_id: Optional[int] = None,
+        cache_context: Optional[str] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -57,26 +138,95 @@ class LLMService:
             messages: List of message dicts with 'role' and 'content'
             temperature: Override default temperature
             max_tokens: Override default max tokens
+            response_mime_type: Output format, e.g. "application/json" to
+                have Gemini return a bare JSON document
+            cache_text: Text identifying the request for the response cache.
+                At temperature 0.0 it is matched exactly, otherwise by embedding
+                similarity. Caching is skipped when not provided.
+            organization_id: Tenant the request is made for; cached responses
+                are only ever served back to the same organization
+            cache_context: Grounding context (e.g. retrieved documents) the
+                response depends on; entries only match the identical context
             **kwargs: Additional parameters for Gemini API
         
         Returns:
             Dict with 'content', 'input_tokens', 'output_tokens', 'total_tokens', 'cost'
         """
+        if cache_text is None or not settings.LLM_CACHE_ENABLED:
+            return await self._generate(messages, temperature, max_tokens, response_mime_type, **kwargs)
+        
+        # Partition the cache per tenant, system prompt and full grounding
+        # context so agents, organizations and document sets never share entries
+        system_prompt = "".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        context_digest = hashlib.sha256((cache_context or "").encode("utf-8")).hexdigest()
+        namespace = hashlib.sha256(
+            f"{self.model_name}|{temperature}|{max_tokens}|{response_mime_type}|"
+            f"{organization_id}|{context_digest}|{system_prompt}".encode("utf-8")
+        ).hexdigest()
+        
+        exact = temperature == 0.0
+        embedding = None
+        if exact:
+            cached = self.cache.get_exact(namespace, cache_text)
+        else:
+            try:
+                embedding = await embedding_service.embed_query(cache_text)
+            except Exception as e:
+                logger.warning(f"LLM cache embedding failed, skipping cache: {e}")
+            cached = self.cache.get_similar(namespace, embedding) if embedding is not None else None
+        
+        if cached is not None:
+            return {
+                **cached,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "total_tokens": 0,
+                "cost": 0.0,
+                "cached": True
+            }
+        
+        response = await self._generate(messages, temperature, max_tokens, response_mime_type, **kwargs)
+        
+        if exact:
+            self.cache.set_exact(namespace, cache_text, response)
+        elif embedding is not None:
+            self.cache.set_similar(namespace, embedding, response)
+        
+        return response
+    
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        stop=stop_after_attempt(3),
+        # Jittered so requests throttled together don't retry together
+        wait=wait_random_exponential(multiplier=1, min=2, max=10)
+    )
+    async def _generate(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        response_mime_type: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Call Gemini and build the response dict with usage and cost"""
         # Convert OpenAI-style messages to Gemini format
         gemini_content = self._convert_messages_to_gemini(messages)
         
         # Prepare generation config
         config = {
-            "temperature": temperature or self.temperature,
+            "temperature": temperature if temperature is not None else self.temperature,
             "max_output_tokens": max_tokens or self.max_tokens,
         }
+        if response_mime_type:
+            config["response_mime_type"] = response_mime_type
         
         # Generate content using new SDK
-        response = await self.client.aio.models.generate_content(
-            model=self.model_name,
-            contents=gemini_content,
-            config=config
-        )
+        async with self._semaphore:
+            response = await self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=gemini_content,
+                config=config
+            )
         
         # Extract response content
         content = response.text
@@ -126,26 +276,29 @@ class LLMService:
         
         # Prepare generation config
         config = {
-            "temperature": temperature or self.temperature,
+            "temperature": temperature if temperature is not None else self.temperature,
             "max_output_tokens": max_tokens or self.max_tokens,
         }
         
         # Generate content with streaming using new SDK
-        stream = self.client.aio.models.generate_content_stream(
-            model=self.model_name,
-            contents=gemini_content,
-            config=config
-        )
-        
-        async for chunk in stream:
-            if chunk.text:
-                yield chunk.text
+        async with self._semaphore:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model_name,
+                contents=gemini_content,
+                config=config
+            )
+            
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
     
     def _convert_messages_to_gemini(self, messages: List[Dict[str, str]]) -> str:
         """
         Convert OpenAI-style messages to Gemini format
         
-        For the new SDK, we'll combine messages into a single prompt string
+        For the new SDK, we'll combine messages into a single prompt string.
+        Message order is preserved, so leading static messages form a stable
+        prompt prefix across requests.
         """
         prompt_parts = []
         
@@ -1,12 +1,48 @@
+import asyncio
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from fastapi import UploadFile
 import os
+from typing import BinaryIO, List, Optional
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# delete_objects accepts at most this many keys per call
+_DELETE_BATCH_SIZE = 1000
+
+# Multipart settings for streamed uploads: at most 4 x 8 MB parts in memory
+_UPLOAD_TRANSFER_CONFIG = TransferConfig(multipart_chunksize=8 * 1024 * 1024, max_concurrency=4)
+
+
+class UploadTooLargeError(Exception):
+    """Raised when a streamed upload exceeds its size limit"""
+
+
+class _CountingReader:
+    """
+    Read-only file wrapper that counts bytes and enforces a size limit
+
+    Exposes only read(), so boto3 streams it part by part instead of
+    seeking to measure it first.
+    """
+
+    def __init__(self, fileobj: BinaryIO, max_bytes: Optional[int] = None):
+        self._fileobj = fileobj
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self.bytes_read += len(data)
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {self.max_bytes} bytes")
+        return data
+
+
 class S3Service:
     """Service for interacting with AWS S3"""
     
@@ -17,29 +53,57 @@ class S3Service:
                 's3',
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
+                region_name=settings.AWS_REGION,
+                # One client per process; keep enough warm connections for
+                # concurrent multipart parts, deletes and index syncs
+                config=Config(
+                    max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=True,
+                    retries={"max_attempts": 3, "mode": "adaptive"}
+                )
             )
             self.bucket = settings.AWS_BUCKET_NAME
     
-    async def upload_file(self, file_obj: UploadFile, object_name: str) -> bool:
-        """Upload a file to S3 bucket"""
+    async def upload_file(
+        self,
+        file_obj: UploadFile,
+        object_name: str,
+        max_bytes: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Stream an uploaded file to S3 bucket
+        
+        Args:
+            file_obj: Uploaded file
+            object_name: Destination key
+            max_bytes: Abort the upload once more than this many bytes are read
+        
+        Returns:
+            Number of bytes uploaded, or None if the upload failed
+        
+        Raises:
+            UploadTooLargeError: If the file exceeds max_bytes
+        """
         if not self.enabled:
-            return False
+            return None
             
         try:
             # Reset file pointer
             file_obj.file.seek(0)
-            self.s3_client.upload_fileobj(
-                file_obj.file,
+            reader = _CountingReader(file_obj.file, max_bytes)
+            await asyncio.to_thread(
+                self.s3_client.upload_fileobj,
+                reader,
                 self.bucket,
                 object_name,
-                ExtraArgs={'ContentType': file_obj.content_type}
+                ExtraArgs={'ContentType': file_obj.content_type},
+                Config=_UPLOAD_TRANSFER_CONFIG
             )
             logger.info(f"Uploaded {object_name} to bucket {self.bucket}")
-            return True
+            return reader.bytes_read
         except ClientError as e:
             logger.error(f"Failed to upload file to S3: {e}")
-            return False
+            return None
 
     def upload_file_path(self, file_path: str, object_name: str) -> bool:
         """Upload a local file path to S3"""
@@ -81,6 +145,38 @@ class S3Service:
         except ClientError as e:
             logger.error(f"Failed to delete file from S3: {e}")
             return False
+
+    def delete_files(self, object_names: List[str]) -> int:
+        """
+        Delete many files from S3 bucket, up to 1000 per request
+        
+        Args:
+            object_names: Keys to delete
+        
+        Returns:
+            Number of keys deleted
+        """
+        if not self.enabled:
+            return 0
+        
+        deleted = 0
+        for start in range(0, len(object_names), _DELETE_BATCH_SIZE):
+            batch = object_names[start:start + _DELETE_BATCH_SIZE]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                )
+            except ClientError as e:
+                logger.error(f"Failed to delete files from S3: {e}")
+                continue
+            errors = response.get("Errors", [])
+            for error in errors:
+                logger.error(f"Failed to delete {error.get('Key')} from S3: {error.get('Message')}")
+            deleted += len(batch) - len(errors)
+        
+        logger.info(f"Deleted {deleted} objects from bucket {self.bucket}")
+        return deleted
             
     def file_exists(self, object_name: str) -> bool:
         """Check if file exists in S3"""
@@ -0,0 +1,106 @@
+"""Semantic cache keyed by embedding similarity"""
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+
+class SemanticCache:
+    """
+    In-memory cache that returns stored values for near-identical inputs
+
+    Entries are partitioned by namespace (e.g. one per agent prompt) so hits
+    never cross between unrelated callers. Each namespace keeps its embeddings
+    as a normalized matrix, so a lookup is a single matrix-vector product.
+    Exact-match lookups are available for deterministic callers.
+    Embeddings can be truncated to their leading `dimensions` to shrink the
+    matrices and lookups when the embedding model supports it.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl_seconds: int = 3600,
+        dimensions: Optional[int] = None
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.dimensions = dimensions
+        # namespace -> (embedding matrix, [(expires_at, value)])
+        self._vectors: Dict[str, Tuple[np.ndarray, List[Tuple[float, Any]]]] = {}
+        # (namespace, key hash) -> (expires_at, value)
+        self._exact: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _normalize(self, embedding: Any) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()[:self.dimensions]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get_exact(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the value stored for exactly this key, if fresh"""
+        entry = self._exact.get((namespace, self._hash(key)))
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set_exact(self, namespace: str, key: str, value: Any) -> None:
+        """Store a value under an exact key"""
+        if len(self._exact) >= self.max_entries:
+            # Drop the oldest insertion (dicts preserve insertion order)
+            self._exact.pop(next(iter(self._exact)))
+        self._exact[(namespace, self._hash(key))] = (time.monotonic() + self.ttl_seconds, value)
+
+    def get_similar(self, namespace: str, embedding: Any) -> Optional[Any]:
+        """Return the value of the most similar fresh entry above the threshold"""
+        entry = self._vectors.get(namespace)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        matrix, values = entry
+        query = self._normalize(embedding)
+        if matrix.shape[1] != query.shape[0]:
+            self.misses += 1
+            return None
+
+        scores = matrix @ query
+        best = int(scores.argmax())
+        expires_at, value = values[best]
+        if scores[best] < self.threshold or expires_at < time.monotonic():
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def set_similar(self, namespace: str, embedding: Any, value: Any) -> None:
+        """Store a value under an embedding"""
+        vector = self._normalize(embedding)[np.newaxis, :]
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        entry = self._vectors.get(namespace)
+        if entry is None or entry[0].shape[1] != vector.shape[1]:
+            self._vectors[namespace] = (vector, [(expires_at, value)])
+            return
+
+        matrix, values = entry
+        if len(values) >= self.max_entries:
+            # Evict the oldest entry
+            matrix = matrix[1:]
+            values = values[1:]
+        self._vectors[namespace] = (np.vstack([matrix, vector]), values + [(expires_at, value)])
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._vectors.clear()
+        self._exact.clear()
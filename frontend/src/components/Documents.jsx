@@ -1,5 +1,5 @@
 import { useState } from 'react';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { documentsAPI } from '../lib/api';
 import { Upload, FileText, Trash2, CheckCircle, XCircle, Loader, AlertCircle } from 'lucide-react';
 import { extractErrorMessage } from '../lib/utils';
@@ -21,18 +21,26 @@ export default function Documents() {
         }
     };
 
-    const { data: documents, isLoading } = useQuery({
+    const { data, isLoading, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
         queryKey: ['documents'],
-        queryFn: async () => {
-            const response = await documentsAPI.list();
-            return response.data;
+        queryFn: async ({ pageParam }) => {
+            const response = await documentsAPI.list(pageParam);
+            return {
+                documents: response.data,
+                nextCursor: response.headers['x-next-cursor'] ?? null,
+            };
         },
+        initialPageParam: null,
+        getNextPageParam: (lastPage) => lastPage.nextCursor,
         // Poll every 3 seconds if any document is still processing
         refetchInterval: (query) => {
-            const hasProcessingDocs = query.state.data?.some(doc => !doc.processed);
+            const hasProcessingDocs = query.state.data?.pages.some(
+                page => page.documents.some(doc => !doc.processed)
+            );
             return hasProcessingDocs ? 3000 : false;
         }
     });
+    const documents = data?.pages.flatMap(page => page.documents);
 
     const deleteMutation = useMutation({
         mutationFn: documentsAPI.delete,
@@ -193,6 +201,18 @@ export default function Documents() {
                         </div>
                     ))}
                 </div>
+
+                {hasNextPage && (
+                    <div className="text-center mt-6">
+                        <button
+                            onClick={() => fetchNextPage()}
+                            disabled={isFetchingNextPage}
+                            className="px-4 py-2 border border-gray-300 rounded-lg text-sm font-medium text-gray-700 hover:bg-gray-50 transition"
+                        >
+                            {isFetchingNextPage ? 'Loading...' : 'Load more'}
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
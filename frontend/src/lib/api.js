@@ -82,7 +82,7 @@ export const documentsAPI = {
     upload: (formData) => api.post('/documents/upload', formData, {
         headers: { 'Content-Type': 'multipart/form-data' },
     }),
-    list: () => api.get('/documents'),
+    list: (cursor) => api.get('/documents', { params: cursor ? { cursor } : {} }),
     get: (id) => api.get(`/documents/${id}`),
     delete: (id) => api.delete(`/documents/${id}`),
 };